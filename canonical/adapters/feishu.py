@@ -183,6 +183,9 @@ class FeishuClient:
     Client for Feishu (Lark) Bitable API.
     
     This is a simplified implementation. In production, use the official SDK.
+    
+    All calls go through one requests.Session, so the token request and the
+    record calls that follow reuse the same keep-alive connection.
     """
     
     BASE_URL = "https://open.feishu.cn/open-apis"
@@ -210,6 +213,11 @@ class FeishuClient:
         
         self._access_token: Optional[str] = None
         self._token_expires: Optional[datetime] = None
+        self._session = requests.Session()
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        self._session.close()
 
     def _get_access_token(self) -> str:
         """Get or refresh access token."""
@@ -220,7 +228,7 @@ class FeishuClient:
         
         # Get new token
         url = f"{self.BASE_URL}/auth/v3/tenant_access_token/internal"
-        response = requests.post(url, json={
+        response = self._session.post(url, json={
             "app_id": self.app_id,
             "app_secret": self.app_secret,
         })
@@ -262,7 +270,7 @@ class FeishuClient:
             API response with record_id
         """
         url = f"{self.BASE_URL}/bitable/v1/apps/{base_token}/tables/{table_id}/records"
-        response = requests.post(url, headers=self._headers(), json={"fields": fields})
+        response = self._session.post(url, headers=self._headers(), json={"fields": fields})
         response.raise_for_status()
         data = response.json()
         
@@ -294,7 +302,7 @@ class FeishuClient:
             API response
         """
         url = f"{self.BASE_URL}/bitable/v1/apps/{base_token}/tables/{table_id}/records/{record_id}"
-        response = requests.put(url, headers=self._headers(), json={"fields": fields})
+        response = self._session.put(url, headers=self._headers(), json={"fields": fields})
         response.raise_for_status()
         data = response.json()
         
@@ -324,7 +332,7 @@ class FeishuClient:
             Record data or None
         """
         url = f"{self.BASE_URL}/bitable/v1/apps/{base_token}/tables/{table_id}/records/{record_id}"
-        response = requests.get(url, headers=self._headers())
+        response = self._session.get(url, headers=self._headers())
         
         if response.status_code == 404:
             return None
@@ -353,7 +361,7 @@ class FeishuClient:
 
         for attempt in range(retry_count + 1):
             try:
-                resp = requests.request(
+                resp = self._session.request(
                     method,
                     url,
                     headers=self._headers(),
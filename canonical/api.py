@@ -14,7 +14,7 @@ from canonical.config import config
 from canonical.models.spec import CanonicalSpec, FeatureStatus
 from canonical.models.refine import RefineResult, RefineContext
 from canonical.engine.orchestrator import Orchestrator
-from canonical.engine.refiner import RequirementRefiner
+from canonical.engine.refiner import RequirementRefiner, get_refiner
 from canonical.store.spec_store import SpecStore
 from canonical.services.ai_client import AIClient
 from canonical.adapters.feishu import FeishuReader
@@ -62,12 +62,19 @@ async def startup():
     # Initialize refiner if LLM is configured
     if config.llm_api_key:
         try:
-            refiner = RequirementRefiner()
+            refiner = get_refiner()
         except Exception as e:
             print(f"Warning: Failed to initialize Requirement Refiner: {e}")
             refiner = None
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Release the AI client's pooled connections."""
+    if ai_client:
+        await ai_client.aclose()
+
+
 @app.get("/")
 async def root():
     """API root"""
@@ -6,8 +6,11 @@ Commands:
 - answer: Apply answers to a feature
 - review: Apply manual review decision
 - publish: Publish a feature to Feishu
+- apply: Answer, review and publish a feature in one call
+- serve: Run commands sent as JSON lines on stdin in one long-lived process
 """
 
+import io
 import json
 import sys
 from pathlib import Path
@@ -133,7 +136,7 @@ def run(input_text: Optional[str], input_file: Optional[str], feature_id: Option
 
 @cli.command()
 @click.argument('feature_id')
-@click.option('--file', '-f', type=click.Path(exists=True), help='从 JSON 文件读取答案')
+@click.option('--file', '-f', type=click.Path(exists=True, allow_dash=True), help='从 JSON 文件读取答案 (- 表示 stdin)')
 @click.option('--answer', '-a', multiple=True, help='直接提供答案 (格式: field_path=value)')
 def answer(feature_id: str, file: Optional[str], answer: tuple):
     """
@@ -143,9 +146,9 @@ def answer(feature_id: str, file: Optional[str], answer: tuple):
     """
     answers = {}
     
-    # Load answers from file
+    # Load answers from file (or stdin for "-")
     if file:
-        with open(file, 'r', encoding='utf-8') as f:
+        with click.open_file(file, 'r', encoding='utf-8') as f:
             answers = json.load(f)
     
     # Add command line answers (override file)
@@ -291,6 +294,71 @@ def publish(feature_id: str, dry_run: bool):
         sys.exit(2)
 
 
+@cli.command()
+@click.argument('feature_id')
+@click.option('--answers', 'answers_file', type=click.Path(exists=True, allow_dash=True), help='从 JSON 文件读取并应用答案 (- 表示 stdin)')
+@click.option('--review', 'decision', type=click.Choice(['go', 'hold', 'drop']), help='确认决策')
+@click.option('--publish', 'do_publish', is_flag=True, help='决策为 go 时发布到 Feishu')
+@click.option('--json', 'as_json', is_flag=True, help='最后输出一行 JSON 结果')
+def apply(feature_id: str, answers_file: Optional[str], decision: Optional[str], do_publish: bool, as_json: bool):
+    """
+    组合命令: 应用答案 -> 确认 -> 发布，一次调用完成
+    
+    FEATURE_ID: Feature 标识符 (如 F-2026-001)
+    
+    提供 --answers 时，答案应用后 Gate 必须全部通过才会继续确认。
+    """
+    outcome = {"feature_id": feature_id, "answered": False, "gate_passed": None,
+               "reviewed": False, "published": False}
+    
+    def finish(code: int) -> None:
+        if as_json:
+            click.echo(json.dumps(outcome, ensure_ascii=False))
+        sys.exit(code)
+    
+    try:
+        orchestrator = Orchestrator()
+        
+        if answers_file:
+            with click.open_file(answers_file, 'r', encoding='utf-8') as f:
+                answers = json.load(f)
+            click.echo(f"正在应用 {len(answers)} 个答案到 {feature_id}...")
+            spec, gate_result = orchestrator.answer(feature_id, answers)
+            outcome["answered"] = True
+            outcome["gate_passed"] = gate_result.overall_pass
+            print_gate_result(gate_result)
+            if not gate_result.overall_pass:
+                click.echo("\n✗ Gate 验证未通过，请继续提供缺失信息")
+                finish(1)
+        
+        if not decision:
+            finish(0)
+        
+        spec = orchestrator.review(feature_id, decision)
+        outcome["reviewed"] = True
+        click.echo(f"\n✓ 决策已应用: {decision}")
+        click.echo(f"   新状态: {spec.feature.status.value}")
+    except ValueError as e:
+        click.echo(f"\n✗ 错误: {str(e)}", err=True)
+        finish(2)
+    
+    if not do_publish or decision != 'go':
+        finish(0)
+    
+    try:
+        result = FeishuPublisher().publish(spec)
+        outcome["published"] = True
+        click.echo("\n=== 发布结果 ===")
+        click.echo(f"操作: {result['operation']}")
+        click.echo(f"External ID: {result['external_id']}")
+        click.echo(f"状态: {result['status']}")
+        click.echo(f"Spec Version: {result['spec_version']}")
+        finish(0)
+    except ValueError as e:
+        click.echo(f"\n✗ 发布失败: {str(e)}", err=True)
+        finish(2)
+
+
 @cli.command()
 @click.option('--url', '-u', help='飞书文档 URL (docx/docs/wiki)')
 @click.option('--document-token', '-d', help='文档 token (document_id)')
@@ -378,6 +446,18 @@ def list(status: str):
             click.echo(f"{feature_id:<15} {spec.feature.status.value:<18} {title:<30} {version:<20}")
 
 
+@cli.command()
+@click.argument('output', type=click.Path())
+def export_ledger(output: str):
+    """
+    导出发布台账 (格式化 JSON)
+    
+    OUTPUT: 输出文件路径
+    """
+    count = Ledger().export_pretty(Path(output))
+    click.echo(f"已导出 {count} 条台账记录到 {output}")
+
+
 @cli.command()
 @click.argument('feature_id')
 def validate(feature_id: str):
@@ -461,6 +541,86 @@ def vv(feature_id: str):
         sys.exit(2)
 
 
+class _ServeStream(io.TextIOBase):
+    """Text stream that forwards each write as a JSON message on the serve channel."""
+
+    def __init__(self, channel, key: str):
+        self._channel = channel
+        self._key = key
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            self._channel.write(json.dumps({self._key: text}, ensure_ascii=False) + "\n")
+            self._channel.flush()
+        return len(text)
+
+
+def _serve_one(args: list) -> int:
+    """Run one CLI invocation in-process and return its exit code."""
+    try:
+        rv = cli.main(args=args, prog_name="canonical", standalone_mode=False)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except Exception as e:
+        click.echo(f"\n✗ 错误: {str(e)}", err=True)
+        return 2
+    return rv if isinstance(rv, int) else 0
+
+
+@cli.command()
+def serve():
+    """
+    常驻模式: 从 stdin 逐行读取命令并在当前进程内执行
+    
+    请求: {"cmd": ["run", "..."], "stdin": "可选的标准输入"}；执行期间输出
+    {"out": 文本} / {"err": 文本}，结束时输出 {"returncode": 退出码}。
+    省去每条命令的解释器启动和导入开销。
+    """
+    channel, requests = sys.stdout, sys.stdin
+    for line in requests:
+        if not line.strip():
+            continue
+        saved = sys.stdin, sys.stdout, sys.stderr
+        sys.stdout = _ServeStream(channel, "out")
+        sys.stderr = _ServeStream(channel, "err")
+        try:
+            try:
+                request = json.loads(line)
+                args = request["cmd"]
+                # 命令只能读到请求自带的输入；交互式提示读到空输入后直接放弃，
+                # 不会吞掉后续请求
+                sys.stdin = io.StringIO(request.get("stdin") or "")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                click.echo(f"错误: 无效的请求: {str(e)}", err=True)
+                returncode = 2
+            else:
+                returncode = _serve_one(args)
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved
+        channel.write(json.dumps({"returncode": returncode}) + "\n")
+        channel.flush()
+
+
 def main():
     """Main entry point."""
     cli()
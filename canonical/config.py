@@ -6,7 +6,7 @@ Loads configuration from environment variables and .env file.
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -23,6 +23,12 @@ class CanonicalConfig(BaseSettings):
     snapshots_dir: Optional[Path] = Field(None, description="Directory for snapshots")
     ledger_dir: Optional[Path] = Field(None, description="Directory for ledger")
     logs_dir: Optional[Path] = Field(None, description="Directory for logs")
+    snapshot_format: Literal["msgpack", "json"] = Field(
+        "msgpack", description="On-disk snapshot format (msgpack falls back to json when not installed)"
+    )
+    snapshot_async_writes: bool = Field(
+        False, description="Write step snapshots on a background thread (save() returns before the file is written)"
+    )
     
     # LLM Configuration
     llm_api_key: Optional[str] = Field(None, description="LLM API key")
@@ -30,6 +36,16 @@ class CanonicalConfig(BaseSettings):
     llm_model: str = Field("gpt-4", description="LLM model to use")
     llm_temperature: float = Field(0.3, ge=0.0, le=2.0, description="LLM temperature")
     llm_max_tokens: int = Field(2000, gt=0, description="Max tokens for LLM response")
+    llm_json_mode: bool = Field(False, description="Request JSON mode (response_format=json_object) from the LLM")
+    llm_json_schema: bool = Field(False, description="Request structured outputs (response_format=json_schema) from the LLM")
+    llm_cache_size: int = Field(128, ge=0, description="Max cached LLM responses per refiner (0 disables)")
+    llm_cache_ttl: int = Field(3600, ge=0, description="Cached LLM response lifetime in seconds")
+    llm_max_concurrency: int = Field(8, ge=1, description="Max concurrent LLM requests for async batch refinement")
+    llm_timeout: float = Field(60.0, gt=0, description="LLM request timeout in seconds")
+    llm_connect_timeout: float = Field(5.0, gt=0, description="LLM connection timeout in seconds")
+    llm_max_retries: int = Field(3, ge=0, le=10, description="LLM client retry count for transient errors")
+    llm_max_connections: int = Field(100, ge=1, description="Max pooled HTTP connections to the LLM API")
+    llm_max_keepalive_connections: int = Field(20, ge=0, description="Max idle keep-alive connections to the LLM API")
     
     # Feishu Configuration
     feishu_app_id: Optional[str] = Field(None, description="Feishu app ID")
@@ -12,7 +12,6 @@ This module handles:
 import json
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from openai import OpenAI
 
 from canonical.models.spec import (
     CanonicalSpec,
@@ -34,6 +33,7 @@ from canonical.models.spec import (
 )
 from canonical.models.gate import ClarifyQuestion
 from canonical.config import config
+from canonical.services.http import make_http_client
 
 
 class LLMCompiler:
@@ -124,11 +124,18 @@ class LLMCompiler:
         if not self.api_key:
             raise ValueError("LLM API key is required. Set CANONICAL_LLM_API_KEY environment variable.")
         
-        # Initialize OpenAI client
-        client_kwargs = {"api_key": self.api_key}
+        # Initialize OpenAI client with a pooled HTTP client and retries
+        client_kwargs = {
+            "api_key": self.api_key,
+            "max_retries": config.llm_max_retries,
+            "http_client": make_http_client(),
+        }
         if self.base_url:
             client_kwargs["base_url"] = self.base_url
         
+        # Imported on first use; openai takes most of a second to import
+        from openai import OpenAI
+        
         self.client = OpenAI(**client_kwargs)
 
     def compile(self, user_input: str, feature_id: Optional[str] = None) -> CanonicalSpec:
@@ -7,12 +7,13 @@ plan_tasks -> generate_vv -> manual_review -> publish
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 
 from canonical.models.spec import (
     CanonicalSpec,
     FeatureStatus,
     MissingField,
+    AcceptanceCriteria,
 )
 from canonical.models.gate import GateResult
 from canonical.models.snapshot import (
@@ -26,7 +27,7 @@ from canonical.models.snapshot import (
 )
 from canonical.engine.gate import GateEngine
 from canonical.engine.compiler import LLMCompiler
-from canonical.engine.refiner import RequirementRefiner
+from canonical.engine.refiner import RequirementRefiner, get_refiner
 from canonical.models.refine import RefineResult, RefineContext
 from canonical.store.spec_store import SpecStore
 from canonical.store.snapshot_store import SnapshotStore
@@ -78,7 +79,7 @@ class Orchestrator:
         """Get or create the Requirement Refiner."""
         if self._refiner is None:
             try:
-                self._refiner = RequirementRefiner()
+                self._refiner = get_refiner()
             except ValueError:
                 # LLM not configured, refiner will be None
                 self._refiner = None
@@ -122,10 +123,7 @@ class Orchestrator:
         # If Gate fails and refiner is available, replace static questions with contextual ones
         if not gate_result.overall_pass and self.refiner:
             # Collect all missing fields
-            all_missing_fields = []
-            all_missing_fields.extend(gate_result.gate_s.missing_fields)
-            all_missing_fields.extend(gate_result.gate_t.missing_fields)
-            all_missing_fields.extend(gate_result.gate_v.missing_fields)
+            all_missing_fields = gate_result.all_missing_fields
             
             if all_missing_fields:
                 # Generate contextual questions using refiner
@@ -133,9 +131,15 @@ class Orchestrator:
                     round=0,
                     feature_id=spec.feature.feature_id,
                 )
-                contextual_questions = self.refiner.generate_clarify_questions(
-                    spec, all_missing_fields, refine_context
-                )
+                if refine_result:
+                    # Reuse questions the refine call already asked
+                    contextual_questions = self.refiner.generate_clarify_questions_from_result(
+                        spec, refine_result, all_missing_fields, refine_context
+                    )
+                else:
+                    contextual_questions = self.refiner.generate_clarify_questions(
+                        spec, all_missing_fields, refine_context
+                    )
                 
                 # Replace static questions with contextual ones
                 if contextual_questions:
@@ -149,11 +153,7 @@ class Orchestrator:
         
         # Update the existing spec version with new status (don't create new version)
         # The spec was already saved in _step_compile, so we update in place
-        spec_file = self.spec_store.base_dir / spec.feature.feature_id / f"{spec.meta.spec_version}.json"
-        if spec_file.exists():
-            import json
-            with open(spec_file, 'w', encoding='utf-8') as f:
-                json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        self.spec_store.overwrite(spec)
         
         return spec, gate_result
 
@@ -226,10 +226,7 @@ class Orchestrator:
         # If Gate fails and refiner is available, replace static questions with contextual ones
         if not gate_result.overall_pass and self.refiner:
             # Collect all missing fields
-            all_missing_fields = []
-            all_missing_fields.extend(gate_result.gate_s.missing_fields)
-            all_missing_fields.extend(gate_result.gate_t.missing_fields)
-            all_missing_fields.extend(gate_result.gate_v.missing_fields)
+            all_missing_fields = gate_result.all_missing_fields
             
             if all_missing_fields:
                 # Generate contextual questions using refiner
@@ -253,11 +250,7 @@ class Orchestrator:
         
         # Update the existing spec version with new status (don't create new version)
         # The spec was already saved in _step_apply_answers
-        spec_file = self.spec_store.base_dir / spec.feature.feature_id / f"{spec.meta.spec_version}.json"
-        if spec_file.exists():
-            import json
-            with open(spec_file, 'w', encoding='utf-8') as f:
-                json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        self.spec_store.overwrite(spec)
         
         return spec, gate_result
 
@@ -317,11 +310,7 @@ class Orchestrator:
         if gate_result.overall_pass:
             spec.feature.status = FeatureStatus.EXECUTABLE_READY
             # Update the existing spec version with new status
-            spec_file = self.spec_store.base_dir / spec.feature.feature_id / f"{spec.meta.spec_version}.json"
-            if spec_file.exists():
-                import json
-                with open(spec_file, 'w', encoding='utf-8') as f:
-                    json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+            self.spec_store.overwrite(spec)
         
         # Spec was already saved in _step_generate_vv, no need to save again
         
@@ -356,11 +345,7 @@ class Orchestrator:
         spec = self._step_manual_review(spec, decision, rationale)
         
         # Update the existing spec file in place (manual_review is read-only, no new version)
-        spec_file = self.spec_store.base_dir / feature_id / f"{spec.meta.spec_version}.json"
-        if spec_file.exists():
-            import json
-            with open(spec_file, 'w', encoding='utf-8') as f:
-                json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        self.spec_store.overwrite(spec)
         
         return spec
 
@@ -416,23 +401,7 @@ class Orchestrator:
             
             # Update acceptance criteria
             if refine_result.draft_spec.get("acceptance_criteria"):
-                from canonical.models.spec import AcceptanceCriteria
-                acceptance_criteria = []
-                for i, ac_data in enumerate(refine_result.draft_spec["acceptance_criteria"]):
-                    if isinstance(ac_data, dict):
-                        ac_id = ac_data.get("id", f"AC-{i+1}")
-                        if not ac_id.startswith("AC-"):
-                            ac_id = f"AC-{i+1}"
-                        acceptance_criteria.append(AcceptanceCriteria(
-                            id=ac_id,
-                            criteria=ac_data.get("criteria", ""),
-                        ))
-                    elif isinstance(ac_data, str):
-                        acceptance_criteria.append(AcceptanceCriteria(
-                            id=f"AC-{i+1}",
-                            criteria=ac_data,
-                        ))
-                spec.spec.acceptance_criteria = acceptance_criteria
+                spec.spec.acceptance_criteria = self._build_acceptance_criteria(refine_result.draft_spec)
         
         # Update assumptions and constraints from genome if available
         if refine_result.genome:
@@ -492,11 +461,7 @@ class Orchestrator:
             updated_spec.feature.status = FeatureStatus.CLARIFYING
         
         # Update spec file
-        spec_file = self.spec_store.base_dir / feature_id / f"{new_version}.json"
-        if spec_file.exists():
-            import json
-            with open(spec_file, 'w', encoding='utf-8') as f:
-                json.dump(updated_spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        self.spec_store.overwrite(updated_spec)
         
         return updated_spec, gate_result
 
@@ -592,7 +557,6 @@ class Orchestrator:
         from canonical.models.spec import (
             Feature,
             Spec,
-            AcceptanceCriteria,
             Planning,
             Quality,
             Decision,
@@ -600,21 +564,7 @@ class Orchestrator:
         )
         
         # Build acceptance criteria
-        acceptance_criteria = []
-        for i, ac_data in enumerate(draft_spec.get("acceptance_criteria", [])):
-            if isinstance(ac_data, dict):
-                ac_id = ac_data.get("id", f"AC-{i+1}")
-                if not ac_id.startswith("AC-"):
-                    ac_id = f"AC-{i+1}"
-                acceptance_criteria.append(AcceptanceCriteria(
-                    id=ac_id,
-                    criteria=ac_data.get("criteria", ""),
-                ))
-            elif isinstance(ac_data, str):
-                acceptance_criteria.append(AcceptanceCriteria(
-                    id=f"AC-{i+1}",
-                    criteria=ac_data,
-                ))
+        acceptance_criteria = self._build_acceptance_criteria(draft_spec)
         
         # Extract goal and non_goals from draft_spec
         goal = draft_spec.get("goal", "")
@@ -624,12 +574,8 @@ class Orchestrator:
         if refine_result and refine_result.genome:
             # Use genome goals if draft_spec goal is empty
             if not goal and refine_result.genome.goals:
-                # Combine all goals if multiple, or use first one
-                if len(refine_result.genome.goals) == 1:
-                    goal = refine_result.genome.goals[0]
-                else:
-                    # Join multiple goals with newlines or semicolons
-                    goal = "\n".join(refine_result.genome.goals)
+                # Combine all goals (a single goal is used as-is)
+                goal = "\n".join(refine_result.genome.goals)
             
             # Use genome non_goals if draft_spec non_goals is empty
             if not non_goals and refine_result.genome.non_goals:
@@ -693,6 +639,24 @@ class Orchestrator:
         
         return spec
 
+    def _build_acceptance_criteria(self, draft_spec: Dict[str, Any]) -> List[AcceptanceCriteria]:
+        """
+        Build acceptance criteria from a draft spec.
+        
+        Items may be dicts ({"id", "criteria"}) or plain strings; IDs not in
+        AC-N form are replaced by their position. Other items are skipped.
+        """
+        return [
+            AcceptanceCriteria(
+                id=ac_data["id"] if str(ac_data.get("id", "")).startswith("AC-") else f"AC-{i+1}",
+                criteria=ac_data.get("criteria", ""),
+            )
+            if isinstance(ac_data, dict)
+            else AcceptanceCriteria(id=f"AC-{i+1}", criteria=ac_data)
+            for i, ac_data in enumerate(draft_spec.get("acceptance_criteria") or [])
+            if isinstance(ac_data, (dict, str))
+        ]
+
     def _step_validate_gates(self, spec: CanonicalSpec) -> GateResult:
         """Execute the validate_gates step."""
         self._step_seq += 1
@@ -7,10 +7,19 @@ This module implements intelligent requirement analysis using LLM to:
 3. Refine vague requirements through conversational interaction
 """
 
+import re
 import json
-from typing import Optional, Dict, Any, List
+import time
+import asyncio
+import string
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache, partial
+from importlib.resources import files
+from typing import Optional, Dict, Any, List, Tuple, Callable, Final
 from datetime import datetime
-from openai import OpenAI
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from canonical.models.refine import (
     RefineResult,
@@ -20,6 +29,21 @@ from canonical.models.refine import (
 from canonical.models.spec import CanonicalSpec, MissingField
 from canonical.models.gate import ClarifyQuestion
 from canonical.config import config
+from canonical.services.http import make_http_client
+
+# orjson is optional; fall back to the stdlib parser. orjson.JSONDecodeError
+# subclasses json.JSONDecodeError, so existing except clauses cover both.
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
 # Import Genome models
 try:
@@ -28,87 +52,229 @@ try:
         GenomeChanges,
         GenomeSnapshot,
         Assumption,
+        Constraint,
     )
 except ImportError:
     RequirementGenome = None
     GenomeChanges = None
     GenomeSnapshot = None
     Assumption = None
+    Constraint = None
+
+
+class _QuestionIn(BaseModel):
+    """A refine question as returned by the LLM."""
+    model_config = ConfigDict(extra="ignore")
+
+    id: Optional[str] = None
+    question: str = ""
+    why_asking: str = ""
+    suggestions: List[str] = []
+    field_path: Optional[str] = None
 
 
-class RequirementRefiner:
+class _RefineLLMOutput(BaseModel):
+    """Refine response as returned by the LLM (see refine_system.md)."""
+    model_config = ConfigDict(extra="ignore")
+
+    understanding_summary: str = ""
+    inferred_assumptions: List[str] = []
+    questions: List[_QuestionIn] = []
+    ready_to_compile: bool = False
+    draft_spec: Optional[Dict[str, Any]] = None
+
+
+class _ClarifyQuestionIn(BaseModel):
+    """A clarify question as returned by the LLM."""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str = ""
+    field_path: str = ""
+    question: str = ""
+    why_asking: str = ""
+    suggestions: List[str] = []
+
+
+class _ClarifyLLMOutput(BaseModel):
     """
-    LLM-based requirement refiner for intelligent requirement analysis.
+    Clarify response schema for structured outputs.
     
-    Uses LLM to:
-    - Analyze user input and infer intent/assumptions
-    - Generate contextual clarification questions
-    - Refine vague requirements through conversation
+    Structured outputs need a top-level object, so questions are wrapped;
+    the plain prompt returns a bare array, which is also accepted.
     """
-    
-    REFINE_SYSTEM_PROMPT = """你是一个需求分析专家。你的任务是帮助用户将模糊的需求想法转化为清晰、可执行的规格。
-
-## 你的工作方式
-
-1. **理解意图**：从用户输入中识别核心目标和业务场景
-2. **识别假设**：推断用户可能的隐含假设（技术栈、目标用户、规模、使用场景等）
-3. **生成摘要**：用 2-3 句话总结你的理解，让用户确认或修正
-4. **提问细化**：只问最关键的 1-2 个问题，每个问题解释为什么需要这个信息，并提供可能的答案建议
-
-## 输出格式（JSON）
-
-{
-  "understanding_summary": "你对需求的理解摘要（2-3句话，Markdown格式）",
-  "inferred_assumptions": ["假设1", "假设2"],
-  "questions": [
-    {
-      "id": "Q1",
-      "question": "问题内容",
-      "why_asking": "这个信息为什么重要",
-      "suggestions": ["可能的答案1", "可能的答案2"]
+    model_config = ConfigDict(extra="ignore")
+
+    questions: List[_ClarifyQuestionIn] = []
+
+
+def _json_schema_format(name: str, model: type) -> Dict[str, Any]:
+    """Build a response_format requesting structured output for a model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": model.model_json_schema()},
     }
-  ],
-  "ready_to_compile": false,
-  "draft_spec": null
-}
-
-如果需求已经足够清晰，设置 ready_to_compile=true，并提供 draft_spec：
-{
-  "ready_to_compile": true,
-  "draft_spec": {
-    "goal": "核心目标描述",
-    "acceptance_criteria": [
-      {"id": "AC-1", "criteria": "验收标准1"},
-      {"id": "AC-2", "criteria": "验收标准2"}
-    ]
-  }
-}
-"""
 
-    CLARIFY_SYSTEM_PROMPT = """你是一个需求分析专家。根据缺失的字段和当前需求上下文，生成简洁明确的澄清问题。
-
-当前需求上下文：
-{context}
-
-缺失的字段：
-{missing_fields}
-
-请为每个缺失字段生成一个澄清问题，问题应该：
-1. 结合当前需求上下文，而不是使用通用模板
-2. 解释为什么需要这个信息
-3. 提供可能的答案建议
-
-返回 JSON 数组格式：
-[
-  {{
-    "id": "Q1",
-    "field_path": "spec.goal",
-    "question": "针对当前需求的具体问题...",
-    "why_asking": "为什么需要这个信息",
-    "suggestions": ["建议1", "建议2"]
-  }}
-]
-"""
+
+class _StreamFieldEmitter:
+    """
+    Emit top-level fields of a streamed JSON object as soon as they complete.
+    
+    Fed with response deltas; once a watched key's value can be fully decoded
+    from the buffer, on_event(key, value) is called (once per key).
+    """
+
+    _KEY_PATTERN = re.compile(
+        r'"(understanding_summary|inferred_assumptions|questions|ready_to_compile|draft_spec)"\s*:\s*'
+    )
+    _WHITESPACE = re.compile(r"\s*")
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, on_event: Callable[[str, Any], None]):
+        self.on_event = on_event
+        self._buffer = ""
+        self._scan_pos = 0
+        self._pending: Dict[str, int] = {}
+        self._emitted: set = set()
+
+    def feed(self, delta: str) -> None:
+        """Add a response delta and emit any fields it completes."""
+        self._buffer += delta
+        
+        # Find newly streamed keys (rescan a little to catch split keys)
+        for match in self._KEY_PATTERN.finditer(self._buffer, max(0, self._scan_pos - 64)):
+            key = match.group(1)
+            if key not in self._emitted and key not in self._pending:
+                self._pending[key] = match.end()
+        self._scan_pos = len(self._buffer)
+        
+        # Emit values that now decode completely
+        for key, value_start in list(self._pending.items()):
+            # The value may start after whitespace that streamed in later
+            value_start = self._WHITESPACE.match(self._buffer, value_start).end()
+            try:
+                value, _ = self._decoder.raw_decode(self._buffer, value_start)
+            except json.JSONDecodeError:
+                continue
+            del self._pending[key]
+            self._emitted.add(key)
+            self.on_event(key, value)
+
+
+@lru_cache(maxsize=4)
+def _load_prompt(name: str) -> str:
+    """Load a prompt from canonical/prompts/<name>.md (read once per process)."""
+    return (files("canonical") / "prompts" / f"{name}.md").read_text(encoding="utf-8")
+
+
+# Loaded once at import; every request reuses the same string objects
+_REFINE_SYSTEM_PROMPT: Final[str] = _load_prompt("refine_system")
+_CLARIFY_SYSTEM_PROMPT: Final[str] = _load_prompt("clarify_system")
+
+
+def _compile_template(template: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """
+    Split a str.format template into (literal, field_name) parts once.
+    
+    Literals are already unescaped ({{ -> {), so rendering is a plain join
+    with no format-spec parsing per call.
+    """
+    return tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+
+
+_CLARIFY_TEMPLATE_PARTS = _compile_template(_CLARIFY_SYSTEM_PROMPT)
+
+
+class _LLMResponseCache:
+    """
+    In-process LRU cache of LLM responses with a TTL.
+    
+    Keys are hashes of the full request (model settings + messages), so only
+    identical prompts hit. Safe to share across threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+        """Build a cache key from request settings and messages."""
+        payload = _json_dumps([params, messages])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_DATE_PREFIX_LOCK = threading.Lock()
+_DATE_PREFIX_CACHE: Dict[str, Any] = {"date": None, "prefix": ""}
+
+
+def _next_genome_version(now: Optional[datetime] = None, previous: Optional[str] = None) -> str:
+    """
+    Generate the next genome version (G-YYYYMMDD-NNNN).
+    
+    NNNN counts the rounds of one genome: it continues from ``previous`` (the
+    version of the genome being refined) on the same day and starts at 0001
+    otherwise. Deriving it from the genome rather than from process state
+    keeps versions increasing across processes and restarts, including for
+    sub-second rounds. The date prefix is formatted once per day. Pass
+    ``now`` to reuse a timestamp the caller already took.
+    """
+    today = (now or datetime.now()).date()
+    with _DATE_PREFIX_LOCK:
+        if _DATE_PREFIX_CACHE["date"] != today:
+            _DATE_PREFIX_CACHE["date"] = today
+            _DATE_PREFIX_CACHE["prefix"] = today.strftime("%Y%m%d")
+        prefix = _DATE_PREFIX_CACHE["prefix"]
+    seq = 1
+    if previous:
+        previous_prefix, _, previous_seq = previous.rpartition("-")
+        if previous_prefix == f"G-{prefix}" and previous_seq.isdigit():
+            seq = int(previous_seq) + 1
+    return f"G-{prefix}-{seq:04d}"
+
+
+class _BaseRefiner:
+    """
+    Shared setup and prompt/response handling for the refiners.
+    
+    Subclasses provide the I/O: RequirementRefiner (sync) and
+    AsyncRequirementRefiner (asyncio). Everything here is client-agnostic.
+    """
+    
+    # Name of the openai client class; openai is imported on first use
+    # because it takes most of a second to import
+    _client_class_name = "OpenAI"
+    
+    # Prompts live in canonical/prompts/
+    REFINE_SYSTEM_PROMPT = _REFINE_SYSTEM_PROMPT
+    CLARIFY_SYSTEM_PROMPT = _CLARIFY_SYSTEM_PROMPT
 
     def __init__(
         self,
@@ -117,9 +283,11 @@ class RequirementRefiner:
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[bool] = None,
     ):
         """
-        Initialize the Requirement Refiner.
+        Initialize the refiner.
         
         Args:
             api_key: OpenAI API key. Defaults to config.llm_api_key.
@@ -127,82 +295,104 @@ class RequirementRefiner:
             model: Model to use. Defaults to config.llm_model.
             temperature: Temperature. Defaults to config.llm_temperature.
             max_tokens: Max tokens. Defaults to config.llm_max_tokens.
+            json_mode: Request JSON mode responses. Defaults to config.llm_json_mode.
+            json_schema: Request structured outputs (takes precedence over
+                json_mode). Defaults to config.llm_json_schema.
         """
         self.api_key = api_key or config.llm_api_key
         self.base_url = base_url or config.llm_base_url
         self.model = model or config.llm_model
         self.temperature = temperature if temperature is not None else config.llm_temperature
         self.max_tokens = max_tokens or config.llm_max_tokens
+        self.json_mode = json_mode if json_mode is not None else config.llm_json_mode
+        self.json_schema = json_schema if json_schema is not None else config.llm_json_schema
         
         if not self.api_key:
             raise ValueError("LLM API key is required. Set CANONICAL_LLM_API_KEY environment variable.")
         
-        # Initialize OpenAI client
-        client_kwargs = {"api_key": self.api_key}
+        # Initialize OpenAI client with a pooled HTTP client and retries
+        client_kwargs = {
+            "api_key": self.api_key,
+            "max_retries": config.llm_max_retries,
+            "http_client": make_http_client(self._client_class_name == "AsyncOpenAI"),
+        }
         if self.base_url:
             client_kwargs["base_url"] = self.base_url
         
-        self.client = OpenAI(**client_kwargs)
-
-    def refine(
-        self,
-        user_input: str,
-        context: Optional[RefineContext] = None,
-    ) -> RefineResult:
-        """
-        Analyze user input and generate refinement result.
+        import openai
         
-        Args:
-            user_input: Raw user input text
-            context: Optional refinement context with conversation history
-            
-        Returns:
-            RefineResult with understanding summary, assumptions, and questions
-        """
-        if context is None:
-            context = RefineContext(round=0)
+        self.client = getattr(openai, self._client_class_name)(**client_kwargs)
+        
+        # Per-instance request settings, frozen once; calls only pass messages
+        self._create = partial(
+            self.client.chat.completions.create,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
         
-        # Build conversation history for context
-        messages = [{"role": "system", "content": self.REFINE_SYSTEM_PROMPT}]
+        # Response formats per prompt kind; kinds without one use plain mode.
+        # json_object cannot express the clarify prompt's top-level array.
+        self._response_formats: Dict[str, Dict[str, Any]] = {}
+        if self.json_schema:
+            self._response_formats["refine"] = _json_schema_format("refine_result", _RefineLLMOutput)
+            self._response_formats["clarify"] = _json_schema_format("clarify_questions", _ClarifyLLMOutput)
+        elif self.json_mode:
+            self._response_formats["refine"] = {"type": "json_object"}
+        self._creates = {
+            kind: partial(self._create, response_format=response_format)
+            for kind, response_format in self._response_formats.items()
+        }
+        self._cache = _LLMResponseCache(config.llm_cache_size, config.llm_cache_ttl)
         
-        # Add conversation history if available
-        for entry in context.conversation_history:
-            entry_content = entry.get("content", "")
-            messages.append({
-                "role": entry.get("role", "user"),
-                "content": entry_content
-            })
+        # Built once and shared by every refine call; never mutated
+        self._refine_system_message = {"role": "system", "content": self.REFINE_SYSTEM_PROMPT}
+
+    def _refine_messages(self, user_input: str, context: RefineContext) -> List[Dict[str, str]]:
+        """Build the refine prompt messages for user input and context."""
+        # Build conversation history for context. Messages carry only the
+        # constant system prompt and normalized history (no timestamps or
+        # versions), so each round extends the previous round's prompt prefix.
+        messages = [self._refine_system_message, *context.history_messages()]
         
         # Add current user input (only if not empty)
         if user_input:
-            messages.append({"role": "user", "content": user_input})
-        
-        # Call LLM
-        response = self._call_llm(messages)
+            messages.append({"role": "user", "content": user_input.rstrip()})
         
-        # Parse response
+        return messages
+
+    @staticmethod
+    def _parse_refine_output(response: str) -> Optional[_RefineLLMOutput]:
+        """Parse and validate a refine LLM response; None if it is unusable."""
         try:
-            data = json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            data = {
-                "understanding_summary": f"我理解你想要：{user_input}",
-                "inferred_assumptions": [],
-                "questions": [],
-                "ready_to_compile": False,
-                "draft_spec": None,
-            }
+            return _RefineLLMOutput.model_validate(_json_loads(response))
+        except (json.JSONDecodeError, ValidationError):
+            return None
+
+    def _build_refine_result(
+        self,
+        user_input: str,
+        context: RefineContext,
+        data: Optional[_RefineLLMOutput],
+    ) -> RefineResult:
+        """Merge a parsed refine LLM response into the context's genome."""
+        if data is None:
+            # Fallback if the response is not JSON or does not match the schema
+            # (e.g. providers without JSON mode)
+            data = _RefineLLMOutput(understanding_summary=f"我理解你想要：{user_input}")
         
         # Build questions list
-        questions = []
-        for i, q_data in enumerate(data.get("questions", [])):
-            if isinstance(q_data, dict):
-                questions.append(RefineQuestion(
-                    id=q_data.get("id", f"Q{i+1}"),
-                    question=q_data.get("question", ""),
-                    why_asking=q_data.get("why_asking", ""),
-                    suggestions=q_data.get("suggestions", []),
-                ))
+        questions = [
+            RefineQuestion(
+                id=q_data.id or f"Q{i+1}",
+                question=q_data.question,
+                why_asking=q_data.why_asking,
+                suggestions=q_data.suggestions,
+                field_path=q_data.field_path,
+            )
+            for i, q_data in enumerate(data.questions)
+        ]
         
         # Build Genome if available
         genome = None
@@ -211,47 +401,62 @@ class RequirementRefiner:
         
         if RequirementGenome and GenomeChanges:
             # Get existing genome from context
+            # (a live genome from refine_from_spec, or a dict from an API round-trip)
             existing_genome = None
-            if context.additional_context and context.additional_context.get('genome'):
+            stored_genome = context.additional_context.get('genome') if context.additional_context else None
+            if isinstance(stored_genome, RequirementGenome):
+                existing_genome = stored_genome
+            elif stored_genome:
                 try:
-                    existing_genome = RequirementGenome.model_validate(context.additional_context['genome'])
+                    existing_genome = RequirementGenome.model_validate(stored_genome)
                 except Exception:
                     pass
             
-            # Create new genome
-            genome = RequirementGenome(
-                genome_version=f"G-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-                round=new_round,
-                summary=data.get("understanding_summary", ""),
-                created_at=existing_genome.created_at if existing_genome else datetime.now(),
-                updated_at=datetime.now(),
+            # Create new genome. An existing genome is shallow-copied so its
+            # lists are shared rather than copied; they are only ever replaced
+            # (never mutated in place) below. One timestamp covers the round.
+            now = datetime.now()
+            genome_version = _next_genome_version(
+                now, existing_genome.genome_version if existing_genome else None
             )
-            
-            # Copy existing data
+            summary = data.understanding_summary
             if existing_genome:
-                genome.goals = existing_genome.goals
-                genome.non_goals = existing_genome.non_goals
-                genome.assumptions = existing_genome.assumptions.copy()
-                genome.constraints = existing_genome.constraints
-                genome.user_stories = existing_genome.user_stories
-                genome.decisions = existing_genome.decisions
-                genome.history = existing_genome.history.copy()
+                genome = existing_genome.model_copy(update={
+                    "genome_version": genome_version,
+                    "round": new_round,
+                    "summary": summary,
+                    "updated_at": now,
+                })
+            else:
+                genome = RequirementGenome(
+                    genome_version=genome_version,
+                    round=new_round,
+                    summary=summary,
+                    created_at=now,
+                    updated_at=now,
+                )
             
-            # Add new assumptions from inferred_assumptions
+            # Collect new assumptions from inferred_assumptions
             changes = GenomeChanges()
-            for assumption_text in data.get("inferred_assumptions", []):
-                if assumption_text and not any(a.content == assumption_text for a in genome.assumptions):
-                    genome.assumptions.append(Assumption(
-                        id=f"A-{len(genome.assumptions) + 1}",
+            new_assumptions = []
+            assumption_set = {a.content.strip() for a in genome.assumptions}
+            for assumption_text in data.inferred_assumptions:
+                assumption_text = assumption_text.strip()
+                if assumption_text and assumption_text not in assumption_set:
+                    assumption_set.add(assumption_text)
+                    new_assumptions.append(Assumption(
+                        id=f"A-{len(genome.assumptions) + len(new_assumptions) + 1}",
                         content=assumption_text,
                         source_round=new_round,
                         confirmed=False,
                     ))
                     changes.new_assumptions.append(assumption_text)
+            if new_assumptions:
+                genome.assumptions = genome.assumptions + new_assumptions
             
             # Update open questions
-            genome.open_questions = [q.model_dump() for q in questions]
-            genome.ready_to_compile = data.get("ready_to_compile", False)
+            genome.open_questions = questions
+            genome.ready_to_compile = data.ready_to_compile
             
             # Create snapshot
             if GenomeSnapshot:
@@ -264,61 +469,27 @@ class RequirementRefiner:
                     user_stories_count=len(genome.user_stories),
                     questions_asked=[q.question for q in questions],
                     user_answers=[],
-                    timestamp=datetime.now(),
+                    timestamp=now,
                 )
-                genome.history.append(snapshot)
+                genome.history = genome.history + [snapshot]
         
         return RefineResult(
             round=new_round,
-            understanding_summary=data.get("understanding_summary", ""),
-            inferred_assumptions=data.get("inferred_assumptions", []),
+            understanding_summary=data.understanding_summary,
+            inferred_assumptions=data.inferred_assumptions,
             questions=questions,
-            ready_to_compile=data.get("ready_to_compile", False),
-            draft_spec=data.get("draft_spec"),
+            ready_to_compile=data.ready_to_compile,
+            draft_spec=data.draft_spec,
             genome=genome,
             changes=changes,
         )
 
-    def apply_feedback(
-        self,
-        feedback: str,
-        context: RefineContext,
-    ) -> RefineResult:
-        """
-        Apply user feedback and continue refinement.
-        
-        Args:
-            feedback: User's feedback/answer
-            context: Current refinement context
-            
-        Returns:
-            Updated RefineResult
-        """
-        # Add feedback to conversation history
-        context.conversation_history.append({
-            "role": "user",
-            "content": feedback
-        })
-        
-        # Continue refinement
-        return self.refine("", context)
-
-    def refine_from_spec(
+    def _seed_context_from_spec(
         self,
         spec: CanonicalSpec,
-        context: Optional[RefineContext] = None,
-    ) -> RefineResult:
-        """
-        Initialize refinement from an existing spec.
-        Builds initial Genome from spec data.
-        
-        Args:
-            spec: Existing CanonicalSpec
-            context: Optional refinement context
-            
-        Returns:
-            RefineResult with initialized Genome
-        """
+        context: Optional[RefineContext],
+    ) -> RefineContext:
+        """Build the initial genome from a spec and store it in the context."""
         if context is None:
             context = RefineContext(
                 round=0,
@@ -335,70 +506,45 @@ class RequirementRefiner:
             
             non_goals = spec.spec.non_goals or []
             
-            # Extract assumptions from planning
-            assumptions = []
-            if spec.planning and spec.planning.known_assumptions:
-                for i, assumption_text in enumerate(spec.planning.known_assumptions):
-                    assumptions.append(Assumption(
-                        id=f"A-{i+1}",
-                        content=assumption_text,
-                        source_round=0,
-                        confirmed=True,  # Already in spec, considered confirmed
-                    ))
-            
-            # Extract constraints
-            constraints = []
-            if spec.planning and spec.planning.constraints:
-                for i, constraint_text in enumerate(spec.planning.constraints):
-                    constraints.append(Constraint(
-                        id=f"C-{i+1}",
-                        content=constraint_text,
-                        source_round=0,
-                        type="general",
-                    ))
+            # Extract assumptions (already in spec, considered confirmed) and
+            # constraints from planning in one pass each
+            planning = spec.planning
+            assumptions = [
+                Assumption(id=f"A-{i+1}", content=text, source_round=0, confirmed=True)
+                for i, text in enumerate(planning.known_assumptions if planning else [])
+            ]
+            constraints = [
+                Constraint(id=f"C-{i+1}", content=text, source_round=0, type="general")
+                for i, text in enumerate(planning.constraints if planning else [])
+            ]
             
             # Create genome
+            now = datetime.now()
             genome = RequirementGenome(
-                genome_version=f"G-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+                genome_version=_next_genome_version(now),
                 round=context.round,
                 summary=f"已有功能：{spec.feature.title or spec.feature.feature_id}",
                 goals=goals,
                 non_goals=non_goals,
                 assumptions=assumptions,
                 constraints=constraints,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
+                created_at=now,
+                updated_at=now,
             )
             
             # Store genome in context
             if context.additional_context is None:
                 context.additional_context = {}
-            context.additional_context['genome'] = genome.model_dump()
+            context.additional_context['genome'] = genome
         
-        # Now call refine with empty input to generate questions
-        # The genome will be used from context
-        return self.refine("", context)
+        return context
 
-    def generate_clarify_questions(
+    def _clarify_messages(
         self,
         spec: CanonicalSpec,
         missing_fields: List[MissingField],
-        context: Optional[RefineContext] = None,
-    ) -> List[ClarifyQuestion]:
-        """
-        Generate contextual clarification questions for missing fields.
-        
-        Args:
-            spec: Current spec
-            missing_fields: List of missing fields
-            context: Optional refinement context
-            
-        Returns:
-            List of ClarifyQuestion objects
-        """
-        if not missing_fields:
-            return []
-        
+    ) -> List[Dict[str, str]]:
+        """Build the clarify prompt messages for a spec and its missing fields."""
         # Build context summary
         spec_context = f"""
 目标: {spec.spec.goal or '(未定义)'}
@@ -406,30 +552,44 @@ class RequirementRefiner:
 验收标准数量: {len(spec.spec.acceptance_criteria)}
 """
         
-        # Format missing fields
-        fields_text = "\n".join([
-            f"- {mf.path}: {mf.reason}"
-            for mf in missing_fields
-        ])
-        
-        # Build prompt
-        user_message = self.CLARIFY_SYSTEM_PROMPT.format(
-            context=spec_context,
-            missing_fields=fields_text
-        )
+        # Build prompt (cached on context + missing fields)
+        fields_tuple = tuple((mf.path, mf.reason) for mf in missing_fields)
+        user_message = _format_clarify(spec_context, fields_tuple)
         
-        # Call LLM
-        messages = [
-            {"role": "system", "content": self.CLARIFY_SYSTEM_PROMPT},
+        # The formatted prompt already embeds the instructions, so it is
+        # sent once instead of alongside the raw template.
+        return [
             {"role": "user", "content": user_message}
         ]
-        
-        response = self._call_llm(messages)
-        
-        # Parse response
+
+    @staticmethod
+    def _load_clarify_data(response: str) -> Optional[List[Any]]:
+        """Decode a clarify LLM response into its question list; None if unusable."""
         try:
-            questions_data = json.loads(response)
+            questions_data = _json_loads(response)
         except json.JSONDecodeError:
+            return None
+        
+        # Structured outputs wrap the array in {"questions": [...]}
+        if isinstance(questions_data, dict):
+            questions_data = questions_data.get("questions", [])
+        return questions_data if isinstance(questions_data, list) else None
+
+    def _parse_clarify_response(
+        self,
+        response: str,
+        missing_fields: List[MissingField],
+    ) -> List[ClarifyQuestion]:
+        """Parse a clarify LLM response, falling back to default questions."""
+        return self._build_clarify_questions(self._load_clarify_data(response), missing_fields)
+
+    def _build_clarify_questions(
+        self,
+        questions_data: Optional[List[Any]],
+        missing_fields: List[MissingField],
+    ) -> List[ClarifyQuestion]:
+        """Convert decoded clarify questions, falling back to default questions."""
+        if questions_data is None:
             # Fallback to default questions
             questions_data = [
                 {
@@ -455,21 +615,556 @@ class RequirementRefiner:
         
         return questions
 
-    def _call_llm(self, messages: List[Dict[str, str]]) -> str:
+    def _reuse_refine_questions(
+        self,
+        refine_result: RefineResult,
+        missing_fields: List[MissingField],
+    ) -> Tuple[List[ClarifyQuestion], List[MissingField]]:
+        """Split missing fields into reused refine questions and uncovered fields."""
+        by_path = {q.field_path: q for q in refine_result.questions if q.field_path}
+        reused = [
+            ClarifyQuestion(
+                id="",
+                field_path=mf.path,
+                question=by_path[mf.path].question,
+                asks_for=mf.path,
+            )
+            for mf in missing_fields
+            if mf.path in by_path
+        ]
+        remaining = [mf for mf in missing_fields if mf.path not in by_path]
+        
+        return reused, remaining
+
+    @staticmethod
+    def _renumber_questions(questions: List[ClarifyQuestion]) -> List[ClarifyQuestion]:
+        """Renumber questions so reused and generated IDs do not collide."""
+        for i, question in enumerate(questions):
+            question.id = f"Q{i+1}"
+        return questions
+
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, str]],
+        response_kind: Optional[str],
+    ) -> Tuple[Any, str, Optional[str]]:
+        """Pick the request callable and look up its cached response."""
+        create = self._creates.get(response_kind, self._create)
+        cache_key = _LLMResponseCache.make_key(create.keywords, messages)
+        return create, cache_key, self._cache.get(cache_key)
+
+    def _cache_store(self, cache_key: Optional[str], response: str, valid: bool) -> None:
+        """Cache a fresh LLM response once the caller has parsed it successfully."""
+        if cache_key is not None and valid and response:
+            self._cache.set(cache_key, response)
+
+
+class RequirementRefiner(_BaseRefiner):
+    """
+    LLM-based requirement refiner for intelligent requirement analysis.
+    
+    Uses LLM to:
+    - Analyze user input and infer intent/assumptions
+    - Generate contextual clarification questions
+    - Refine vague requirements through conversation
+    """
+    
+    def refine(
+        self,
+        user_input: str,
+        context: Optional[RefineContext] = None,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+    ) -> RefineResult:
+        """
+        Analyze user input and generate refinement result.
+        
+        Args:
+            user_input: Raw user input text
+            context: Optional refinement context with conversation history
+            on_event: Optional callback(field, value) fired while the response
+                streams, as soon as a top-level field (e.g. understanding_summary)
+                is complete
+            
+        Returns:
+            RefineResult with understanding summary, assumptions, and questions
+        """
+        if context is None:
+            context = RefineContext(round=0)
+        
+        messages = self._refine_messages(user_input, context)
+        
+        # Call LLM
+        on_delta = _StreamFieldEmitter(on_event).feed if on_event else None
+        response, cache_key = self._call_llm(messages, response_kind="refine", on_delta=on_delta)
+        data = self._parse_refine_output(response)
+        self._cache_store(cache_key, response, data is not None)
+        
+        return self._build_refine_result(user_input, context, data)
+
+    def apply_feedback(
+        self,
+        feedback: str,
+        context: RefineContext,
+    ) -> RefineResult:
+        """
+        Apply user feedback and continue refinement.
+        
+        Args:
+            feedback: User's feedback/answer
+            context: Current refinement context
+            
+        Returns:
+            Updated RefineResult
+        """
+        # Add feedback to conversation history
+        context.add_message("user", feedback)
+        
+        # Continue refinement
+        return self.refine("", context)
+
+    def refine_from_spec(
+        self,
+        spec: CanonicalSpec,
+        context: Optional[RefineContext] = None,
+    ) -> RefineResult:
+        """
+        Initialize refinement from an existing spec.
+        Builds initial Genome from spec data.
+        
+        Args:
+            spec: Existing CanonicalSpec
+            context: Optional refinement context
+            
+        Returns:
+            RefineResult with initialized Genome
+        """
+        context = self._seed_context_from_spec(spec, context)
+        
+        # Now call refine with empty input to generate questions
+        # The genome will be used from context
+        return self.refine("", context)
+
+    def generate_clarify_questions(
+        self,
+        spec: CanonicalSpec,
+        missing_fields: List[MissingField],
+        context: Optional[RefineContext] = None,
+    ) -> List[ClarifyQuestion]:
+        """
+        Generate contextual clarification questions for missing fields.
+        
+        Args:
+            spec: Current spec
+            missing_fields: List of missing fields
+            context: Optional refinement context
+            
+        Returns:
+            List of ClarifyQuestion objects
+        """
+        if not missing_fields:
+            return []
+        
+        response, cache_key = self._call_llm(self._clarify_messages(spec, missing_fields), response_kind="clarify")
+        questions_data = self._load_clarify_data(response)
+        self._cache_store(cache_key, response, questions_data is not None)
+        return self._build_clarify_questions(questions_data, missing_fields)
+
+    def generate_clarify_questions_batch(
+        self,
+        specs_and_missing: List[Tuple[CanonicalSpec, List[MissingField]]],
+        poll_interval: float = 10.0,
+        timeout: Optional[float] = None,
+    ) -> List[List[ClarifyQuestion]]:
+        """
+        Generate clarification questions for many specs via the OpenAI Batch API.
+        
+        Batch requests are cheaper and have higher rate limits, but complete
+        asynchronously (up to 24h), so this is meant for bulk/offline runs.
+        
+        Args:
+            specs_and_missing: List of (spec, missing_fields) pairs
+            poll_interval: Seconds between batch status checks
+            timeout: Max seconds to wait for the batch (None waits indefinitely)
+            
+        Returns:
+            One list of ClarifyQuestion objects per input pair, in input order
+            
+        Raises:
+            RuntimeError: If the batch fails, expires or is cancelled
+            TimeoutError: If the batch does not finish within timeout
+        """
+        results: List[List[ClarifyQuestion]] = [[] for _ in specs_and_missing]
+        
+        # Build one chat completion request per pair that has missing fields
+        lines = []
+        for i, (spec, missing_fields) in enumerate(specs_and_missing):
+            if not missing_fields:
+                continue
+            lines.append(_json_dumps({
+                "custom_id": f"clarify-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": self._clarify_messages(spec, missing_fields),
+                    "temperature": self.temperature,
+                    "max_tokens": self.max_tokens,
+                    **({"response_format": self._response_formats["clarify"]}
+                       if "clarify" in self._response_formats else {}),
+                },
+            }))
+        if not lines:
+            return results
+        
+        # Upload requests and start the batch
+        batch_file = self.client.files.create(
+            file=("clarify_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        
+        # Poll until the batch reaches a terminal state
+        started = time.monotonic()
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch {batch.id} did not finish within {timeout}s")
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+        
+        # Map responses back by custom_id
+        responses: Dict[str, str] = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = _json_loads(line)
+                body = (record.get("response") or {}).get("body") or {}
+                choices = body.get("choices") or [{}]
+                responses[record["custom_id"]] = (choices[0].get("message") or {}).get("content") or ""
+        
+        # Failed or missing requests fall back to default questions
+        for i, (spec, missing_fields) in enumerate(specs_and_missing):
+            if missing_fields:
+                results[i] = self._parse_clarify_response(
+                    responses.get(f"clarify-{i}", ""), missing_fields
+                )
+        
+        return results
+
+    def generate_clarify_questions_from_result(
+        self,
+        spec: CanonicalSpec,
+        refine_result: RefineResult,
+        missing_fields: List[MissingField],
+        context: Optional[RefineContext] = None,
+    ) -> List[ClarifyQuestion]:
+        """
+        Generate clarification questions, reusing questions from a refine result.
+        
+        Refine questions tagged with the path of a missing field are reused;
+        the LLM is only called for missing fields they do not cover.
+        
+        Args:
+            spec: Current spec
+            refine_result: Result of a previous refine call
+            missing_fields: List of missing fields
+            context: Optional refinement context
+            
+        Returns:
+            List of ClarifyQuestion objects
+        """
+        reused, remaining = self._reuse_refine_questions(refine_result, missing_fields)
+        return self._renumber_questions(
+            reused + self.generate_clarify_questions(spec, remaining, context)
+        )
+
+    def _call_llm(
+        self,
+        messages: List[Dict[str, str]],
+        response_kind: Optional[str] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, Optional[str]]:
         """
         Call the LLM API.
         
         Args:
             messages: List of message dicts with role and content
+            response_kind: Prompt kind ("refine" or "clarify"), used to request
+                JSON mode / structured outputs when configured
+            on_delta: Optional callback receiving each streamed content delta
+                (a cached response is delivered as a single delta)
             
         Returns:
-            LLM response content
+            (LLM response content, cache key). The key is None for a cached
+            response; otherwise the caller stores the response under it via
+            _cache_store once it has parsed.
         """
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
+        create, cache_key, cached = self._cache_lookup(messages, response_kind)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached, None
+        
+        stream = create(messages=messages)
+        
+        # Accumulate streamed deltas; some providers send chunks without choices
+        parts = []
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content or ""
+                parts.append(delta)
+                if on_delta and delta:
+                    on_delta(delta)
+        
+        return "".join(parts), cache_key
+
+
+class AsyncRequirementRefiner(_BaseRefiner):
+    """
+    Async variant of RequirementRefiner backed by AsyncOpenAI.
+    
+    Use it to run many refinements concurrently (see refine_many); LLM calls
+    are I/O bound, so throughput scales with config.llm_max_concurrency up to
+    the provider's rate limit. 429/5xx responses are retried with backoff by
+    the OpenAI client.
+    """
+    
+    _client_class_name = "AsyncOpenAI"
+
+    async def refine(
+        self,
+        user_input: str,
+        context: Optional[RefineContext] = None,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+    ) -> RefineResult:
+        """
+        Analyze user input and generate refinement result.
+        
+        Args:
+            user_input: Raw user input text
+            context: Optional refinement context with conversation history
+            on_event: Optional callback(field, value) fired while the response
+                streams, as soon as a top-level field is complete
+            
+        Returns:
+            RefineResult with understanding summary, assumptions, and questions
+        """
+        if context is None:
+            context = RefineContext(round=0)
+        
+        messages = self._refine_messages(user_input, context)
+        on_delta = _StreamFieldEmitter(on_event).feed if on_event else None
+        response, cache_key = await self._call_llm(messages, response_kind="refine", on_delta=on_delta)
+        data = self._parse_refine_output(response)
+        self._cache_store(cache_key, response, data is not None)
+        return self._build_refine_result(user_input, context, data)
+
+    async def refine_many(
+        self,
+        inputs: List[str],
+        contexts: Optional[List[Optional[RefineContext]]] = None,
+    ) -> List[RefineResult]:
+        """
+        Refine many inputs concurrently.
+        
+        Args:
+            inputs: Raw user input texts
+            contexts: Optional refinement contexts, one per input
+            
+        Returns:
+            RefineResults in input order
+        """
+        if contexts is None:
+            contexts = [None] * len(inputs)
+        semaphore = asyncio.Semaphore(config.llm_max_concurrency)
+        
+        async def refine_one(user_input: str, context: Optional[RefineContext]) -> RefineResult:
+            async with semaphore:
+                return await self.refine(user_input, context)
+        
+        return await asyncio.gather(*[
+            refine_one(user_input, context)
+            for user_input, context in zip(inputs, contexts)
+        ])
+
+    async def apply_feedback(
+        self,
+        feedback: str,
+        context: RefineContext,
+    ) -> RefineResult:
+        """
+        Apply user feedback and continue refinement.
+        
+        Args:
+            feedback: User's feedback/answer
+            context: Current refinement context
+            
+        Returns:
+            Updated RefineResult
+        """
+        context.add_message("user", feedback)
+        return await self.refine("", context)
+
+    async def refine_from_spec(
+        self,
+        spec: CanonicalSpec,
+        context: Optional[RefineContext] = None,
+    ) -> RefineResult:
+        """
+        Initialize refinement from an existing spec.
+        
+        Args:
+            spec: Existing CanonicalSpec
+            context: Optional refinement context
+            
+        Returns:
+            RefineResult with initialized Genome
+        """
+        context = self._seed_context_from_spec(spec, context)
+        return await self.refine("", context)
+
+    async def generate_clarify_questions(
+        self,
+        spec: CanonicalSpec,
+        missing_fields: List[MissingField],
+        context: Optional[RefineContext] = None,
+    ) -> List[ClarifyQuestion]:
+        """
+        Generate contextual clarification questions for missing fields.
+        
+        Args:
+            spec: Current spec
+            missing_fields: List of missing fields
+            context: Optional refinement context
+            
+        Returns:
+            List of ClarifyQuestion objects
+        """
+        if not missing_fields:
+            return []
+        
+        response, cache_key = await self._call_llm(self._clarify_messages(spec, missing_fields), response_kind="clarify")
+        questions_data = self._load_clarify_data(response)
+        self._cache_store(cache_key, response, questions_data is not None)
+        return self._build_clarify_questions(questions_data, missing_fields)
+
+    async def generate_clarify_questions_from_result(
+        self,
+        spec: CanonicalSpec,
+        refine_result: RefineResult,
+        missing_fields: List[MissingField],
+        context: Optional[RefineContext] = None,
+    ) -> List[ClarifyQuestion]:
+        """
+        Generate clarification questions, reusing questions from a refine result.
+        
+        Args:
+            spec: Current spec
+            refine_result: Result of a previous refine call
+            missing_fields: List of missing fields
+            context: Optional refinement context
+            
+        Returns:
+            List of ClarifyQuestion objects
+        """
+        reused, remaining = self._reuse_refine_questions(refine_result, missing_fields)
+        return self._renumber_questions(
+            reused + await self.generate_clarify_questions(spec, remaining, context)
         )
+
+    async def _call_llm(
+        self,
+        messages: List[Dict[str, str]],
+        response_kind: Optional[str] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Call the LLM API.
+        
+        Args:
+            messages: List of message dicts with role and content
+            response_kind: Prompt kind ("refine" or "clarify"), used to request
+                JSON mode / structured outputs when configured
+            on_delta: Optional callback receiving each streamed content delta
+                (a cached response is delivered as a single delta)
+            
+        Returns:
+            (LLM response content, cache key). The key is None for a cached
+            response; otherwise the caller stores the response under it via
+            _cache_store once it has parsed.
+        """
+        create, cache_key, cached = self._cache_lookup(messages, response_kind)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached, None
+        
+        stream = await create(messages=messages)
+        
+        # Accumulate streamed deltas; some providers send chunks without choices
+        parts = []
+        async for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content or ""
+                parts.append(delta)
+                if on_delta and delta:
+                    on_delta(delta)
         
-        return response.choices[0].message.content or ""
+        return "".join(parts), cache_key
+
+
+@lru_cache(maxsize=4)
+def get_refiner(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    json_mode: Optional[bool] = None,
+    json_schema: Optional[bool] = None,
+) -> RequirementRefiner:
+    """
+    Get a shared RequirementRefiner for the given settings.
+    
+    Refiners (and their OpenAI client connection pools) are cached per
+    argument set and are safe to share across threads. Arguments default
+    to config values, as in RequirementRefiner.
+    
+    Raises:
+        ValueError: If no LLM API key is configured
+    """
+    return RequirementRefiner(
+        api_key=api_key,
+        base_url=base_url,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        json_mode=json_mode,
+        json_schema=json_schema,
+    )
+
+
+@lru_cache(maxsize=256)
+def _format_clarify(context_str: str, fields_tuple: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    Format the clarify prompt for a spec context and its missing fields.
+    
+    Args:
+        context_str: Spec context summary
+        fields_tuple: Tuple of (path, reason) pairs for missing fields
+        
+    Returns:
+        Formatted clarify prompt
+    """
+    fields_text = "\n".join(f"- {path}: {reason}" for path, reason in fields_tuple)
+    values = {"context": context_str, "missing_fields": fields_text}
+    return "".join(
+        literal + (values[field_name] if field_name is not None else "")
+        for literal, field_name in _CLARIFY_TEMPLATE_PARTS
+    )
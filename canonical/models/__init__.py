@@ -1,65 +1,89 @@
-"""Data models for the Canonical system."""
+"""Data models for the Canonical system.
 
-from canonical.models.spec import (
-    CanonicalSpec,
-    Feature,
-    FeatureStatus,
-    Spec,
-    AcceptanceCriteria,
-    Planning,
-    Task,
-    TaskType,
-    VV,
-    VVType,
-    Quality,
-    MissingField,
-    Decision,
-    Meta,
-    ProjectContextRef,
-)
-from canonical.models.gate import (
-    GateResult,
-    GateStatus,
-)
-from canonical.models.snapshot import (
-    StepSnapshot,
-    Step,
-    Evidence,
-    EvidenceType,
-)
-from canonical.models.refine import (
-    RefineResult,
-    RefineQuestion,
-    RefineContext,
-)
+Models are imported lazily (PEP 562): importing one submodule, directly or
+through this package, does not build the pydantic schemas of the others.
+"""
 
-__all__ = [
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from canonical.models.spec import (
+        CanonicalSpec,
+        Feature,
+        FeatureStatus,
+        Spec,
+        AcceptanceCriteria,
+        Planning,
+        Task,
+        TaskType,
+        VV,
+        VVType,
+        Quality,
+        MissingField,
+        Decision,
+        Meta,
+        ProjectContextRef,
+    )
+    from canonical.models.gate import (
+        GateResult,
+        GateStatus,
+    )
+    from canonical.models.snapshot import (
+        StepSnapshot,
+        Step,
+        Evidence,
+        EvidenceType,
+    )
+    from canonical.models.refine import (
+        RefineResult,
+        RefineQuestion,
+        RefineContext,
+    )
+
+_LAZY = {
     # Spec models
-    "CanonicalSpec",
-    "Feature",
-    "FeatureStatus",
-    "Spec",
-    "AcceptanceCriteria",
-    "Planning",
-    "Task",
-    "TaskType",
-    "VV",
-    "VVType",
-    "Quality",
-    "MissingField",
-    "Decision",
-    "Meta",
-    "ProjectContextRef",
+    "CanonicalSpec": "canonical.models.spec",
+    "Feature": "canonical.models.spec",
+    "FeatureStatus": "canonical.models.spec",
+    "Spec": "canonical.models.spec",
+    "AcceptanceCriteria": "canonical.models.spec",
+    "Planning": "canonical.models.spec",
+    "Task": "canonical.models.spec",
+    "TaskType": "canonical.models.spec",
+    "VV": "canonical.models.spec",
+    "VVType": "canonical.models.spec",
+    "Quality": "canonical.models.spec",
+    "MissingField": "canonical.models.spec",
+    "Decision": "canonical.models.spec",
+    "Meta": "canonical.models.spec",
+    "ProjectContextRef": "canonical.models.spec",
     # Gate models
-    "GateResult",
-    "GateStatus",
+    "GateResult": "canonical.models.gate",
+    "GateStatus": "canonical.models.gate",
     # Snapshot models
-    "StepSnapshot",
-    "Step",
-    "Evidence",
-    "EvidenceType",
+    "StepSnapshot": "canonical.models.snapshot",
+    "Step": "canonical.models.snapshot",
+    "Evidence": "canonical.models.snapshot",
+    "EvidenceType": "canonical.models.snapshot",
     # Refine models
-    "RefineResult",
-    "RefineQuestion",
-    "RefineContext",
-]
+    "RefineResult": "canonical.models.refine",
+    "RefineQuestion": "canonical.models.refine",
+    "RefineContext": "canonical.models.refine",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str) -> Any:
+    """Import a model from its submodule on first access."""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
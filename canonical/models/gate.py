@@ -5,14 +5,20 @@ This module defines the data structures for Gate validation results,
 following the Gate model defined in 02_gate_model.md.
 """
 
+from itertools import chain
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from canonical.models.spec import MissingField
 
+_PASS = "PASS"
+_FAIL = "FAIL"
+
 
 class GateStatus(BaseModel):
     """Status of a single gate."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     is_passed: bool = Field(False, description="Whether the gate passed")
     missing_fields: List[MissingField] = Field(default_factory=list, description="Missing fields causing failure")
     reasons: List[str] = Field(default_factory=list, description="Reasons for pass/fail")
@@ -20,6 +26,8 @@ class GateStatus(BaseModel):
 
 class ClarifyQuestion(BaseModel):
     """A question to clarify missing information."""
+    model_config = ConfigDict(defer_build=True)
+
     id: str = Field(..., description="Question identifier")
     field_path: str = Field(..., description="Path to the field being asked about")
     question: str = Field(..., description="The question text")
@@ -28,12 +36,20 @@ class ClarifyQuestion(BaseModel):
 
 class WeightedDetails(BaseModel):
     """Weighted scoring details for completeness calculation."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     goal_quality: float = Field(0.0, ge=0.0, le=1.0, description="Goal quality score")
     acceptance_criteria_quality: float = Field(0.0, ge=0.0, le=1.0, description="AC quality score")
     tasks_quality: float = Field(0.0, ge=0.0, le=1.0, description="Tasks quality score")
     vv_quality: float = Field(0.0, ge=0.0, le=1.0, description="V&V quality score")
 
 
+# Shared empty defaults; the models are frozen, so build a new instance
+# rather than mutating one of these in place
+_EMPTY_GATE_STATUS = GateStatus()
+_EMPTY_WEIGHTED_DETAILS = WeightedDetails()
+
+
 class GateResult(BaseModel):
     """
     Complete result of gate validation.
@@ -41,11 +57,13 @@ class GateResult(BaseModel):
     Contains the status of all three gates (S, T, V), completeness score,
     and any clarify questions that need to be answered.
     """
-    gate_s: GateStatus = Field(default_factory=GateStatus, description="Gate S (Spec) status")
-    gate_t: GateStatus = Field(default_factory=GateStatus, description="Gate T (Tasks) status")
-    gate_v: GateStatus = Field(default_factory=GateStatus, description="Gate V (V&V) status")
+    model_config = ConfigDict(defer_build=True)
+
+    gate_s: GateStatus = Field(default_factory=lambda: _EMPTY_GATE_STATUS, description="Gate S (Spec) status")
+    gate_t: GateStatus = Field(default_factory=lambda: _EMPTY_GATE_STATUS, description="Gate T (Tasks) status")
+    gate_v: GateStatus = Field(default_factory=lambda: _EMPTY_GATE_STATUS, description="Gate V (V&V) status")
     completeness_score: float = Field(0.0, ge=0.0, le=1.0, description="Overall completeness score")
-    weighted_details: WeightedDetails = Field(default_factory=WeightedDetails, description="Scoring details")
+    weighted_details: WeightedDetails = Field(default_factory=lambda: _EMPTY_WEIGHTED_DETAILS, description="Scoring details")
     overall_pass: bool = Field(False, description="Whether all gates passed")
     next_action: str = Field("clarify", description="Recommended next action")
     clarify_questions: List[ClarifyQuestion] = Field(default_factory=list, description="Questions for clarification")
@@ -58,20 +76,29 @@ class GateResult(BaseModel):
     @property
     def all_missing_fields(self) -> List[MissingField]:
         """Get all missing fields from all gates."""
-        fields = []
-        fields.extend(self.gate_s.missing_fields)
-        fields.extend(self.gate_t.missing_fields)
-        fields.extend(self.gate_v.missing_fields)
-        return fields
+        return list(chain(
+            self.gate_s.missing_fields,
+            self.gate_t.missing_fields,
+            self.gate_v.missing_fields,
+        ))
+
+    @property
+    def missing_fields_count(self) -> int:
+        """Count missing fields across all gates without building the list."""
+        return (
+            len(self.gate_s.missing_fields)
+            + len(self.gate_t.missing_fields)
+            + len(self.gate_v.missing_fields)
+        )
 
     def to_summary(self) -> Dict[str, Any]:
         """Generate a summary of the gate result."""
         return {
-            "gate_s": "PASS" if self.gate_s.is_passed else "FAIL",
-            "gate_t": "PASS" if self.gate_t.is_passed else "FAIL",
-            "gate_v": "PASS" if self.gate_v.is_passed else "FAIL",
-            "completeness_score": f"{self.completeness_score:.2f}",
+            "gate_s": _PASS if self.gate_s.is_passed else _FAIL,
+            "gate_t": _PASS if self.gate_t.is_passed else _FAIL,
+            "gate_v": _PASS if self.gate_v.is_passed else _FAIL,
+            "completeness_score": "%.2f" % self.completeness_score,
             "overall_pass": self.overall_pass,
             "next_action": self.next_action,
-            "missing_fields_count": len(self.all_missing_fields),
+            "missing_fields_count": self.missing_fields_count,
         }
@@ -4,48 +4,66 @@ Requirement Genome Models
 Data models for requirement evolution tracking.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional
+from dataclasses import dataclass
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class Assumption(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Assumption:
     """带来源的假设"""
-    id: str = Field(..., description="Assumption ID (A-1, A-2, ...)")
-    content: str = Field(..., description="Assumption content")
-    source_round: int = Field(..., description="Round when this was added")
-    confirmed: bool = Field(False, description="Whether confirmed by user")
+    id: Annotated[str, Field(description="Assumption ID (A-1, A-2, ...)")]
+    content: Annotated[str, Field(description="Assumption content")]
+    source_round: Annotated[int, Field(description="Round when this was added")]
+    confirmed: Annotated[bool, Field(description="Whether confirmed by user")] = False
 
 
-class Constraint(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Constraint:
     """带来源的约束"""
-    id: str = Field(..., description="Constraint ID (C-1, C-2, ...)")
-    content: str = Field(..., description="Constraint content")
-    source_round: int = Field(..., description="Round when this was added")
-    type: str = Field("general", description="Type: technical/business/time/resource")
+    id: Annotated[str, Field(description="Constraint ID (C-1, C-2, ...)")]
+    content: Annotated[str, Field(description="Constraint content")]
+    source_round: Annotated[int, Field(description="Round when this was added")]
+    type: Annotated[str, Field(description="Type: technical/business/time/resource")] = "general"
 
 
-class UserStory(BaseModel):
+@dataclass(slots=True, frozen=True)
+class UserStory:
     """用户故事"""
-    id: str = Field(..., description="User Story ID (US-1, US-2, ...)")
-    as_a: str = Field(..., description="As a [role]")
-    i_want: str = Field(..., description="I want [feature]")
-    so_that: str = Field(..., description="So that [benefit]")
-    source_round: int = Field(..., description="Round when this was added")
-    priority: str = Field("medium", description="Priority: high/medium/low")
+    id: Annotated[str, Field(description="User Story ID (US-1, US-2, ...)")]
+    as_a: Annotated[str, Field(description="As a [role]")]
+    i_want: Annotated[str, Field(description="I want [feature]")]
+    so_that: Annotated[str, Field(description="So that [benefit]")]
+    source_round: Annotated[int, Field(description="Round when this was added")]
+    priority: Annotated[str, Field(description="Priority: high/medium/low")] = "medium"
 
 
-class Decision(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Decision:
     """已决策信息"""
-    id: str = Field(..., description="Decision ID (D-1, D-2, ...)")
-    question: str = Field(..., description="Original question")
-    answer: str = Field(..., description="User's answer")
-    round: int = Field(..., description="Round when decided")
-    impact: str = Field("", description="Impact on requirement")
+    id: Annotated[str, Field(description="Decision ID (D-1, D-2, ...)")]
+    question: Annotated[str, Field(description="Original question")]
+    answer: Annotated[str, Field(description="User's answer")]
+    round: Annotated[int, Field(description="Round when decided")]
+    impact: Annotated[str, Field(description="Impact on requirement")] = ""
+
+
+class OpenQuestion(BaseModel):
+    """待澄清问题"""
+    model_config = ConfigDict(defer_build=True)
+
+    id: str = Field(..., description="Question ID (e.g., Q1, Q2)")
+    question: str = Field(..., description="The question text")
+    why_asking: str = Field("", description="Explanation of why this information is needed")
+    suggestions: List[str] = Field(default_factory=list, description="Possible answer suggestions")
+    field_path: Optional[str] = Field(None, description="Spec field this question clarifies, if any (e.g., spec.goal)")
 
 
 class GenomeSnapshot(BaseModel):
     """轮次快照"""
+    model_config = ConfigDict(defer_build=True)
+
     round: int
     genome_version: str
     summary: str
@@ -59,6 +77,8 @@ class GenomeSnapshot(BaseModel):
 
 class GenomeChanges(BaseModel):
     """本轮变更摘要"""
+    model_config = ConfigDict(defer_build=True)
+
     new_assumptions: List[str] = Field(default_factory=list, description="新增假设列表")
     new_constraints: List[str] = Field(default_factory=list, description="新增约束列表")
     new_user_stories: List[str] = Field(default_factory=list, description="新增用户故事列表")
@@ -68,6 +88,7 @@ class GenomeChanges(BaseModel):
 
 class RequirementGenome(BaseModel):
     """需求基因组 - 累积式需求状态"""
+    model_config = ConfigDict(defer_build=True)
     
     # Version info
     genome_version: str = Field(..., description="Genome version (G-YYYYMMDD-NNNN)")
@@ -85,7 +106,8 @@ class RequirementGenome(BaseModel):
     decisions: List[Decision] = Field(default_factory=list)
     
     # Clarification state
-    open_questions: List[Dict[str, Any]] = Field(default_factory=list)
+    # RefineQuestion subclasses OpenQuestion, so refine rounds store theirs as-is
+    open_questions: List[OpenQuestion] = Field(default_factory=list)
     ready_to_compile: bool = Field(False)
     
     # Meta info
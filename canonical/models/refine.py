@@ -5,19 +5,27 @@ Data models for LLM-driven requirement refinement and clarification.
 """
 
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 # Import Genome models for forward reference resolution
-from canonical.models.genome import RequirementGenome, GenomeChanges
+from canonical.models.genome import RequirementGenome, GenomeChanges, OpenQuestion
 
 
-class RefineQuestion(BaseModel):
+def _canonicalize_message(entry: Dict[str, str]) -> Dict[str, str]:
+    """
+    Normalize a history entry into an LLM message.
+    
+    Keys are always in (role, content) order and trailing whitespace is
+    stripped, so identical conversations produce byte-identical prompt
+    prefixes (which provider-side prompt caches key on).
+    """
+    return {"role": entry.get("role", "user"), "content": entry.get("content", "").rstrip()}
+
+
+class RefineQuestion(OpenQuestion):
     """A single refinement question generated by LLM."""
     
-    id: str = Field(..., description="Question ID (e.g., Q1, Q2)")
-    question: str = Field(..., description="The question text")
     why_asking: str = Field(..., description="Explanation of why this information is needed")
-    suggestions: List[str] = Field(default_factory=list, description="Possible answer suggestions")
 
 
 class RefineResult(BaseModel):
@@ -60,3 +68,19 @@ class RefineContext(BaseModel):
     
     # Any additional context
     additional_context: Dict[str, Any] = Field(default_factory=dict, description="Additional context for refinement")
+
+    # Conversation history as LLM messages, built once and appended to.
+    # Private attrs are not serialized, so a deserialized context rebuilds it.
+    _messages: Optional[List[Dict[str, str]]] = PrivateAttr(default=None)
+
+    def history_messages(self) -> List[Dict[str, str]]:
+        """Get conversation history as a list of LLM message dicts."""
+        if self._messages is None or len(self._messages) != len(self.conversation_history):
+            self._messages = [_canonicalize_message(entry) for entry in self.conversation_history]
+        return self._messages
+
+    def add_message(self, role: str, content: str) -> None:
+        """Append a message to the conversation history."""
+        self.conversation_history.append({"role": role, "content": content})
+        if self._messages is not None:
+            self._messages.append(_canonicalize_message({"role": role, "content": content}))
@@ -5,11 +5,17 @@ This module defines the data structures for pipeline step snapshots,
 following the schema defined in 03_orchestrator_steps_io.md.
 """
 
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator
-import re
+from typing import Annotated, List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+
+from canonical.models.spec import FeatureId, SpecVersion, _utcnow
+
+# ID formats, checked by pydantic-core without calling back into Python
+RunId = Annotated[str, StringConstraints(pattern=r"^R-\d{8}-\d{4}$")]
+EvidenceId = Annotated[str, StringConstraints(pattern=r"^E-\d+$")]
 
 
 class StepName(str, Enum):
@@ -37,14 +43,18 @@ class EvidenceType(str, Enum):
 
 class Step(BaseModel):
     """Information about a pipeline step."""
+    model_config = ConfigDict(defer_build=True)
+
     name: StepName = Field(..., description="Step name")
     seq: int = Field(..., ge=1, description="Step sequence number")
-    started_at: datetime = Field(default_factory=datetime.utcnow, description="Start time")
+    started_at: datetime = Field(default_factory=_utcnow, description="Start time")
     ended_at: Optional[datetime] = Field(None, description="End time")
 
 
 class StepInput(BaseModel):
     """Inputs to a step."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     canonical_spec_ref: Optional[str] = Field(None, description="Reference to input spec version")
     context_ref: Optional[str] = Field(None, description="Reference to context")
     user_answer_ref: Optional[str] = Field(None, description="Reference to user answer")
@@ -53,6 +63,8 @@ class StepInput(BaseModel):
 
 class StepOutput(BaseModel):
     """Outputs from a step."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     gate_result: Optional[Dict[str, Any]] = Field(None, description="Gate result if applicable")
     spec_version_out: Optional[str] = Field(None, description="Output spec version if modified")
     questions: Optional[List[Dict[str, Any]]] = Field(None, description="Clarify questions if applicable")
@@ -61,21 +73,25 @@ class StepOutput(BaseModel):
     additional: Dict[str, Any] = Field(default_factory=dict, description="Additional outputs")
 
 
-class StepDecision(BaseModel):
+@dataclass(slots=True, frozen=True)
+class StepDecision:
     """A decision made during a step."""
-    decision: str = Field(..., description="The decision made")
-    reason: str = Field(..., description="Reason for the decision")
-    next_step: Optional[str] = Field(None, description="Next step to execute")
+    decision: Annotated[str, Field(description="The decision made")]
+    reason: Annotated[str, Field(description="Reason for the decision")]
+    next_step: Annotated[Optional[str], Field(description="Next step to execute")] = None
 
 
-class EvidenceLink(BaseModel):
+@dataclass(slots=True, frozen=True)
+class EvidenceLink:
     """Link to evidence."""
-    type: EvidenceType = Field(..., description="Type of evidence")
-    evidence_id: str = Field(..., description="Evidence identifier")
+    type: Annotated[EvidenceType, Field(description="Type of evidence")]
+    evidence_id: Annotated[str, Field(description="Evidence identifier")]
 
 
 class StepError(BaseModel):
     """An error that occurred during a step."""
+    model_config = ConfigDict(defer_build=True)
+
     error_code: str = Field(..., description="Error code")
     message: str = Field(..., description="Error message")
     retryable: bool = Field(False, description="Whether the error is retryable")
@@ -84,11 +100,20 @@ class StepError(BaseModel):
 
 class StepMeta(BaseModel):
     """Metadata for a step snapshot."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     engine_version: str = Field("orchestrator-0.1", description="Engine version")
     llm_model: Optional[str] = Field(None, description="LLM model used")
     extensions: Dict[str, Any] = Field(default_factory=dict, description="Extension data")
 
 
+# Shared empty defaults; the models are frozen, so build a new instance
+# rather than mutating one of these in place
+_EMPTY_STEP_INPUT = StepInput()
+_EMPTY_STEP_OUTPUT = StepOutput()
+_EMPTY_STEP_META = StepMeta()
+
+
 class StepSnapshot(BaseModel):
     """
     Complete snapshot of a pipeline step execution.
@@ -96,49 +121,23 @@ class StepSnapshot(BaseModel):
     This is the audit trail for every step in the pipeline,
     enabling replay and debugging.
     """
-    run_id: str = Field(..., description="Run identifier, format: R-YYYYMMDD-NNNN")
-    feature_id: str = Field(..., description="Feature identifier")
-    spec_version_in: str = Field(..., description="Input spec version")
-    spec_version_out: Optional[str] = Field(None, description="Output spec version")
+    model_config = ConfigDict(defer_build=True)
+
+    run_id: RunId = Field(..., description="Run identifier, format: R-YYYYMMDD-NNNN")
+    feature_id: FeatureId = Field(..., description="Feature identifier")
+    spec_version_in: SpecVersion = Field(..., description="Input spec version")
+    spec_version_out: Optional[SpecVersion] = Field(None, description="Output spec version")
     step: Step = Field(..., description="Step information")
-    inputs: StepInput = Field(default_factory=StepInput, description="Step inputs")
-    outputs: StepOutput = Field(default_factory=StepOutput, description="Step outputs")
+    inputs: StepInput = Field(default_factory=lambda: _EMPTY_STEP_INPUT, description="Step inputs")
+    outputs: StepOutput = Field(default_factory=lambda: _EMPTY_STEP_OUTPUT, description="Step outputs")
     decisions: List[StepDecision] = Field(default_factory=list, description="Decisions made")
     evidence_links: List[EvidenceLink] = Field(default_factory=list, description="Links to evidence")
     errors: List[StepError] = Field(default_factory=list, description="Errors encountered")
-    meta: StepMeta = Field(default_factory=StepMeta, description="Metadata")
-
-    @field_validator("run_id")
-    @classmethod
-    def validate_run_id_format(cls, v: str) -> str:
-        if not re.match(r"^R-\d{8}-\d{4}$", v):
-            raise ValueError(f"Invalid run_id format: {v}. Expected: R-YYYYMMDD-NNNN")
-        return v
-
-    @field_validator("feature_id")
-    @classmethod
-    def validate_feature_id_format(cls, v: str) -> str:
-        if not re.match(r"^F-\d{4}-\d{3}$", v):
-            raise ValueError(f"Invalid feature_id format: {v}. Expected: F-YYYY-NNN")
-        return v
-
-    @field_validator("spec_version_in")
-    @classmethod
-    def validate_spec_version_in_format(cls, v: str) -> str:
-        if not re.match(r"^S-\d{8}-\d{4}$", v):
-            raise ValueError(f"Invalid spec_version_in format: {v}. Expected: S-YYYYMMDD-NNNN")
-        return v
-
-    @field_validator("spec_version_out")
-    @classmethod
-    def validate_spec_version_out_format(cls, v: Optional[str]) -> Optional[str]:
-        if v is not None and not re.match(r"^S-\d{8}-\d{4}$", v):
-            raise ValueError(f"Invalid spec_version_out format: {v}. Expected: S-YYYYMMDD-NNNN")
-        return v
+    meta: StepMeta = Field(default_factory=lambda: _EMPTY_STEP_META, description="Metadata")
 
     def mark_completed(self) -> None:
         """Mark the step as completed by setting the end time."""
-        self.step.ended_at = datetime.utcnow()
+        self.step.ended_at = _utcnow()
 
     @property
     def duration_ms(self) -> Optional[int]:
@@ -146,25 +145,42 @@ class StepSnapshot(BaseModel):
         if self.step.ended_at is None:
             return None
         delta = self.step.ended_at - self.step.started_at
-        return int(delta.total_seconds() * 1000)
+        return delta.days * 86_400_000 + delta.seconds * 1000 + delta.microseconds // 1000
 
 
-class EvidenceSource(BaseModel):
+@dataclass(slots=True, frozen=True)
+class EvidenceSource:
     """Source of evidence."""
-    ref: str = Field(..., description="Reference to the source")
-    hash: Optional[str] = Field(None, description="Content hash for verification")
+    ref: Annotated[str, Field(description="Reference to the source")]
+    hash: Annotated[Optional[str], Field(description="Content hash for verification")] = None
+
+
+EXCERPT_MAX_LENGTH = 500
+
+
+def _truncate_excerpt(text: str) -> str:
+    """Clip an evidence excerpt to EXCERPT_MAX_LENGTH characters."""
+    return text if len(text) <= EXCERPT_MAX_LENGTH else text[:EXCERPT_MAX_LENGTH]
 
 
 class EvidenceContent(BaseModel):
     """Content of evidence."""
-    excerpt: str = Field(..., max_length=500, description="Short excerpt")
+    model_config = ConfigDict(defer_build=True)
+
+    excerpt: str = Field(..., max_length=EXCERPT_MAX_LENGTH, description="Short excerpt (use from_text to truncate raw text)")
     note: Optional[str] = Field(None, description="Note about how this evidence is used")
 
+    @classmethod
+    def from_text(cls, text: str, note: Optional[str] = None) -> "EvidenceContent":
+        """Build content from raw text, truncating the excerpt to fit EXCERPT_MAX_LENGTH."""
+        return cls(excerpt=_truncate_excerpt(text), note=note)
+
 
-class EvidenceLinkedTo(BaseModel):
+@dataclass(slots=True, frozen=True)
+class EvidenceLinkedTo:
     """What the evidence is linked to."""
-    spec_path: Optional[str] = Field(None, description="Path in the spec")
-    step: Optional[str] = Field(None, description="Step name")
+    spec_path: Annotated[Optional[str], Field(description="Path in the spec")] = None
+    step: Annotated[Optional[str], Field(description="Step name")] = None
 
 
 class Evidence(BaseModel):
@@ -173,16 +189,11 @@ class Evidence(BaseModel):
     
     Links source materials to spec fields and pipeline steps.
     """
-    evidence_id: str = Field(..., description="Evidence identifier, format: E-NNNN")
+    model_config = ConfigDict(defer_build=True)
+
+    evidence_id: EvidenceId = Field(..., description="Evidence identifier, format: E-NNNN")
     type: EvidenceType = Field(..., description="Type of evidence")
     source: EvidenceSource = Field(..., description="Source of the evidence")
     content: EvidenceContent = Field(..., description="Evidence content")
     linked_to: List[EvidenceLinkedTo] = Field(default_factory=list, description="What this links to")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation time")
-
-    @field_validator("evidence_id")
-    @classmethod
-    def validate_evidence_id_format(cls, v: str) -> str:
-        if not re.match(r"^E-\d+$", v):
-            raise ValueError(f"Invalid evidence_id format: {v}. Expected: E-NNNN")
-        return v
+    created_at: datetime = Field(default_factory=_utcnow, description="Creation time")
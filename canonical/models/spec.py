@@ -5,11 +5,23 @@ This module defines the core data structures for the Canonical system,
 following the MVP schema defined in 01_canonical_spec_mvp_schema.md.
 """
 
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from enum import Enum
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator
-import re
+from typing import Annotated, List, Literal, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, StringConstraints
+
+# ID formats, checked by pydantic-core without calling back into Python
+ACId = Annotated[str, StringConstraints(pattern=r"^AC-\d+$")]
+TaskId = Annotated[str, StringConstraints(pattern=r"^T-\d+$")]
+VVId = Annotated[str, StringConstraints(pattern=r"^VV-\d+$")]
+FeatureId = Annotated[str, StringConstraints(pattern=r"^F-\d{4}-\d{3}$")]
+SpecVersion = Annotated[str, StringConstraints(pattern=r"^S-\d{8}-\d{4}$")]
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching stored timestamps."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 class FeatureStatus(str, Enum):
@@ -51,34 +63,27 @@ class EvidenceType(str, Enum):
 
 class AcceptanceCriteria(BaseModel):
     """A single acceptance criterion."""
-    id: str = Field(..., description="Unique identifier, format: AC-N")
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
+    id: ACId = Field(..., description="Unique identifier, format: AC-N")
     criteria: str = Field(..., description="The acceptance criterion text")
     test_hint: Optional[str] = Field(None, description="Optional hint for testing")
 
-    @field_validator("id")
-    @classmethod
-    def validate_id_format(cls, v: str) -> str:
-        if not re.match(r"^AC-\d+$", v):
-            raise ValueError(f"Invalid AC id format: {v}. Expected: AC-N")
-        return v
-
 
 class Estimate(BaseModel):
     """Task estimation."""
-    unit: str = Field(..., description="Unit of estimation: hour or day")
-    value: float = Field(..., gt=0, description="Estimation value")
+    model_config = ConfigDict(defer_build=True)
 
-    @field_validator("unit")
-    @classmethod
-    def validate_unit(cls, v: str) -> str:
-        if v not in ["hour", "day"]:
-            raise ValueError(f"Invalid unit: {v}. Expected: hour or day")
-        return v
+    unit: Literal["hour", "day"] = Field(..., description="Unit of estimation: hour or day")
+    value: float = Field(..., gt=0, description="Estimation value")
 
 
 class Task(BaseModel):
     """A single task in the planning."""
-    task_id: str = Field(..., description="Unique identifier, format: T-N")
+    # Frozen blocks field reassignment only; list fields still mutate in place
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
+    task_id: TaskId = Field(..., description="Unique identifier, format: T-N")
     title: str = Field(..., min_length=1, description="Task title")
     type: TaskType = Field(..., description="Type of task")
     scope: str = Field(..., min_length=1, description="Task scope/what to do")
@@ -88,40 +93,23 @@ class Task(BaseModel):
     dependencies: List[str] = Field(default_factory=list, description="List of task_ids this depends on")
     affected_components: List[str] = Field(default_factory=list, description="Affected file paths/components")
 
-    @field_validator("task_id")
-    @classmethod
-    def validate_task_id_format(cls, v: str) -> str:
-        if not re.match(r"^T-\d+$", v):
-            raise ValueError(f"Invalid task_id format: {v}. Expected: T-N")
-        return v
-
 
 class VV(BaseModel):
     """Verification and Validation item."""
-    vv_id: str = Field(..., description="Unique identifier, format: VV-N")
-    task_id: str = Field(..., description="Reference to task_id")
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
+    vv_id: VVId = Field(..., description="Unique identifier, format: VV-N")
+    task_id: TaskId = Field(..., description="Reference to task_id")
     type: VVType = Field(..., description="Type of verification")
     procedure: str = Field(..., min_length=1, description="Verification procedure")
     expected_result: str = Field(..., min_length=1, description="Expected result")
     evidence_required: List[str] = Field(default_factory=list, description="Required evidence types")
 
-    @field_validator("vv_id")
-    @classmethod
-    def validate_vv_id_format(cls, v: str) -> str:
-        if not re.match(r"^VV-\d+$", v):
-            raise ValueError(f"Invalid vv_id format: {v}. Expected: VV-N")
-        return v
-
-    @field_validator("task_id")
-    @classmethod
-    def validate_task_id_format(cls, v: str) -> str:
-        if not re.match(r"^T-\d+$", v):
-            raise ValueError(f"Invalid task_id format: {v}. Expected: T-N")
-        return v
-
 
 class MVPDefinition(BaseModel):
     """MVP definition within planning."""
+    model_config = ConfigDict(defer_build=True)
+
     mvp_goal: Optional[str] = Field(None, description="What MVP validates")
     mvp_cut_lines: List[str] = Field(default_factory=list, description="What's cut for MVP")
     mvp_risks: List[str] = Field(default_factory=list, description="Risks to watch in MVP")
@@ -129,6 +117,8 @@ class MVPDefinition(BaseModel):
 
 class Planning(BaseModel):
     """Planning section of the spec."""
+    model_config = ConfigDict(defer_build=True)
+
     mvp_definition: Optional[MVPDefinition] = Field(None, description="MVP definition")
     tasks: List[Task] = Field(default_factory=list, description="List of tasks")
     vv: List[VV] = Field(default_factory=list, description="List of V&V items")
@@ -136,53 +126,50 @@ class Planning(BaseModel):
     constraints: List[str] = Field(default_factory=list, description="Constraints from requirement genome")
 
 
-class MissingField(BaseModel):
+@dataclass(slots=True, frozen=True)
+class MissingField:
     """A missing field identified during gate validation."""
-    path: str = Field(..., description="JSON path to the missing field")
-    reason: str = Field(..., description="Reason why this field is needed")
+    path: Annotated[str, Field(description="JSON path to the missing field")]
+    reason: Annotated[str, Field(description="Reason why this field is needed")]
 
 
 class Quality(BaseModel):
     """Quality assessment of the spec."""
+    model_config = ConfigDict(defer_build=True)
+
     completeness_score: float = Field(0.0, ge=0.0, le=1.0, description="Completeness score 0.0-1.0")
     missing_fields: List[MissingField] = Field(default_factory=list, description="List of missing fields")
 
 
 class Decision(BaseModel):
     """Decision recommendation."""
-    recommendation: str = Field("hold", description="Recommendation: go, hold, or drop")
-    rationale: List[str] = Field(default_factory=list, description="List of reasons")
+    model_config = ConfigDict(defer_build=True)
 
-    @field_validator("recommendation")
-    @classmethod
-    def validate_recommendation(cls, v: str) -> str:
-        if v not in ["go", "hold", "drop"]:
-            raise ValueError(f"Invalid recommendation: {v}. Expected: go, hold, or drop")
-        return v
+    recommendation: Literal["go", "hold", "drop"] = Field("hold", description="Recommendation: go, hold, or drop")
+    rationale: List[str] = Field(default_factory=list, description="List of reasons")
 
 
 class SourceArtifact(BaseModel):
     """Source artifact reference."""
+    model_config = ConfigDict(defer_build=True)
+
     type: EvidenceType = Field(..., description="Type of source")
     ref: str = Field(..., description="Reference to the source")
 
 
 class Meta(BaseModel):
     """Metadata for the spec."""
-    spec_version: Optional[str] = Field(None, description="Version identifier, format: S-YYYYMMDD-NNNN")
+    model_config = ConfigDict(defer_build=True)
+
+    spec_version: Optional[SpecVersion] = Field(None, description="Version identifier, format: S-YYYYMMDD-NNNN")
     source_artifacts: List[SourceArtifact] = Field(default_factory=list, description="Source artifacts")
     extensions: Dict[str, Any] = Field(default_factory=dict, description="Extension data")
 
-    @field_validator("spec_version")
-    @classmethod
-    def validate_spec_version_format(cls, v: Optional[str]) -> Optional[str]:
-        if v is not None and not re.match(r"^S-\d{8}-\d{4}$", v):
-            raise ValueError(f"Invalid spec_version format: {v}. Expected: S-YYYYMMDD-NNNN")
-        return v
-
 
 class ProjectContextRef(BaseModel):
     """Reference to project context."""
+    model_config = ConfigDict(defer_build=True)
+
     project_id: Optional[str] = Field(None, description="Project identifier")
     context_version: Optional[str] = Field(None, description="Context version")
     project_record_id: Optional[str] = Field(None, description="Feishu project record ID")
@@ -192,6 +179,8 @@ class ProjectContextRef(BaseModel):
 
 class Spec(BaseModel):
     """The core specification content."""
+    model_config = ConfigDict(defer_build=True)
+
     goal: str = Field("", description="Core problem/user value to solve")
     non_goals: List[str] = Field(default_factory=list, description="What is explicitly not in scope")
     background: Optional[str] = Field(None, description="Optional background information")
@@ -200,18 +189,13 @@ class Spec(BaseModel):
 
 class Feature(BaseModel):
     """Feature metadata."""
-    feature_id: str = Field(..., description="Unique identifier, format: F-YYYY-NNN")
+    model_config = ConfigDict(defer_build=True)
+
+    feature_id: FeatureId = Field(..., description="Unique identifier, format: F-YYYY-NNN")
     title: str = Field("", description="Short title")
     status: FeatureStatus = Field(FeatureStatus.DRAFT, description="Current status")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
-    updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update timestamp")
-
-    @field_validator("feature_id")
-    @classmethod
-    def validate_feature_id_format(cls, v: str) -> str:
-        if not re.match(r"^F-\d{4}-\d{3}$", v):
-            raise ValueError(f"Invalid feature_id format: {v}. Expected: F-YYYY-NNN")
-        return v
+    created_at: datetime = Field(default_factory=_utcnow, description="Creation timestamp")
+    updated_at: datetime = Field(default_factory=_utcnow, description="Last update timestamp")
 
 
 class CanonicalSpec(BaseModel):
@@ -221,6 +205,8 @@ class CanonicalSpec(BaseModel):
     This is the core data structure that flows through the entire pipeline,
     from initial input to final publish.
     """
+    model_config = ConfigDict(defer_build=True)
+
     schema_version: str = Field("1.0", description="Schema version")
     feature: Feature = Field(..., description="Feature metadata")
     project_context_ref: Optional[ProjectContextRef] = Field(None, description="Project context reference")
@@ -230,16 +216,35 @@ class CanonicalSpec(BaseModel):
     decision: Decision = Field(default_factory=Decision, description="Decision section")
     meta: Meta = Field(default_factory=Meta, description="Metadata")
 
+    # (id(tasks list), len, {task_id: position}); rebuilt when the list changes
+    _task_index: Optional[Tuple[int, int, Dict[str, int]]] = PrivateAttr(default=None)
+
     def model_post_init(self, __context: Any) -> None:
         """Update the updated_at timestamp."""
-        self.feature.updated_at = datetime.utcnow()
+        self.feature.updated_at = _utcnow()
+
+    def _task_positions(self, rebuild: bool = False) -> Dict[str, int]:
+        """Get the task_id -> position index, rebuilding it if the task list changed."""
+        tasks = self.planning.tasks
+        cached = self._task_index
+        if rebuild or cached is None or cached[0] != id(tasks) or cached[1] != len(tasks):
+            positions: Dict[str, int] = {}
+            for i, task in enumerate(tasks):
+                positions.setdefault(task.task_id, i)
+            cached = (id(tasks), len(tasks), positions)
+            self._task_index = cached
+        return cached[2]
 
     def get_task_by_id(self, task_id: str) -> Optional[Task]:
         """Get a task by its ID."""
-        for task in self.planning.tasks:
-            if task.task_id == task_id:
-                return task
-        return None
+        tasks = self.planning.tasks
+        i = self._task_positions().get(task_id)
+        if i is None or tasks[i].task_id != task_id:
+            # Tasks may have been replaced or renamed in place; re-index once
+            i = self._task_positions(rebuild=True).get(task_id)
+            if i is None:
+                return None
+        return tasks[i]
 
     def get_vv_for_task(self, task_id: str) -> List[VV]:
         """Get all V&V items for a task."""
@@ -247,9 +252,5 @@ class CanonicalSpec(BaseModel):
 
     def has_all_tasks_covered_by_vv(self) -> bool:
         """Check if all tasks have at least one V&V item."""
-        if not self.planning.tasks:
-            return True
-        for task in self.planning.tasks:
-            if not self.get_vv_for_task(task.task_id):
-                return False
-        return True
+        covered = {vv.task_id for vv in self.planning.vv}
+        return all(task.task_id in covered for task in self.planning.tasks)
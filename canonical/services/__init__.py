@@ -3,5 +3,6 @@ Services layer for Canonical system.
 """
 
 from canonical.services.ai_client import AIClient
+from canonical.services.http import make_http_client
 
-__all__ = ["AIClient"]
+__all__ = ["AIClient", "make_http_client"]
@@ -2,8 +2,9 @@
 AI Client for AI Builder Space platform.
 Provides audio transcription functionality.
 """
-import io
-from typing import Optional, Dict, Any
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional, Dict, Any, Union
 import httpx
 
 
@@ -23,17 +24,35 @@ class AIClient:
         
         self.token = token
         self.base_url = base_url
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def transcribe_audio(
         self,
-        audio_file: bytes,
+        audio_file: Union[bytes, Path],
         language: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Transcribe audio using AI Builder Space transcription API.
         
         Args:
-            audio_file: Audio file data as bytes
+            audio_file: Audio data as bytes, or a path to stream from disk
             language: Optional BCP-47 language code hint (e.g., 'en', 'zh-CN')
             
         Returns:
@@ -43,34 +62,33 @@ class AIClient:
             Exception: If transcription fails
         """
         try:
-            # Create a file-like object from bytes
-            audio_io = io.BytesIO(audio_file)
-            
-            # Prepare multipart form data
-            files = {
-                "audio_file": ("audio.webm", audio_io, "audio/webm")
-            }
-            data = {}
-            if language:
-                data["language"] = language
-            
-            # Use httpx to make multipart/form-data request
-            async with httpx.AsyncClient() as client:
+            with ExitStack() as stack:
+                # Bytes go into the multipart body as-is; a path is opened and
+                # streamed by the encoder instead of being read into memory
+                if isinstance(audio_file, Path):
+                    audio_file = stack.enter_context(audio_file.open("rb"))
+                
+                # Prepare multipart form data
+                files = {
+                    "audio_file": ("audio.webm", audio_file, "audio/webm")
+                }
+                data = {}
+                if language:
+                    data["language"] = language
+                
+                # Multipart/form-data request over the shared, kept-alive client
+                client = await self._get_client()
                 response = await client.post(
-                    f"{self.base_url}/audio/transcriptions",
-                    headers={
-                        "Authorization": f"Bearer {self.token}"
-                    },
+                    "/audio/transcriptions",
                     files=files,
                     data=data,
-                    timeout=60.0
                 )
-                
-                if response.status_code != 200:
-                    raise Exception(f"Transcription failed: {response.text}")
-                
-                result = response.json()
-                return result
+            
+            if response.status_code != 200:
+                raise Exception(f"Transcription failed: {response.text}")
+            
+            result = response.json()
+            return result
             
         except Exception as e:
             print(f"Audio transcription failed: {str(e)}")
@@ -0,0 +1,28 @@
+"""
+Shared HTTP client settings for LLM API calls.
+"""
+from typing import Union
+
+import httpx
+
+from canonical.config import config
+
+
+def make_http_client(async_client: bool = False) -> Union[httpx.Client, httpx.AsyncClient]:
+    """
+    Build the pooled httpx client handed to the OpenAI SDK.
+
+    Keep-alive limits and timeouts come from config, so repeated calls reuse
+    connections instead of paying a TLS handshake each time.
+
+    Args:
+        async_client: Build an httpx.AsyncClient (for AsyncOpenAI) instead of httpx.Client
+    """
+    client_class = httpx.AsyncClient if async_client else httpx.Client
+    return client_class(
+        limits=httpx.Limits(
+            max_connections=config.llm_max_connections,
+            max_keepalive_connections=config.llm_max_keepalive_connections,
+        ),
+        timeout=httpx.Timeout(config.llm_timeout, connect=config.llm_connect_timeout),
+    )
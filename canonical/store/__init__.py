@@ -1,11 +1,34 @@
-"""Storage components for the Canonical system."""
+"""Storage components for the Canonical system.
 
-from canonical.store.spec_store import SpecStore
-from canonical.store.snapshot_store import SnapshotStore
-from canonical.store.ledger import Ledger
+Stores are imported lazily (PEP 562), so using one does not load the others.
+"""
 
-__all__ = [
-    "SpecStore",
-    "SnapshotStore",
-    "Ledger",
-]
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from canonical.store.spec_store import SpecStore
+    from canonical.store.snapshot_store import SnapshotStore
+    from canonical.store.ledger import Ledger
+
+_LAZY = {
+    "SpecStore": "canonical.store.spec_store",
+    "SnapshotStore": "canonical.store.snapshot_store",
+    "Ledger": "canonical.store.ledger",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str) -> Any:
+    """Import a store from its submodule on first access."""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,38 @@
+"""
+File writing helpers for the file stores.
+"""
+
+import os
+from pathlib import Path
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Durably replace path with data.
+
+    The bytes go to a temporary sibling that is fsynced and then renamed over
+    path, so readers see either the old or the new file, never a partial
+    one. The directory is fsynced afterwards so the rename survives a crash.
+    """
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        os.fsync(fd)
+    except BaseException:
+        os.close(fd)
+        tmp.unlink(missing_ok=True)
+        raise
+    os.close(fd)
+    os.replace(tmp, path)
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on some platforms (Windows)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
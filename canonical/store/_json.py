@@ -0,0 +1,74 @@
+"""
+JSON encoding helpers for the file stores.
+
+orjson is used when installed (it encodes datetimes and enums natively, in
+C); otherwise the stdlib encoder produces the same indented UTF-8 layout.
+"""
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+M = TypeVar("M", bound=BaseModel)
+
+# orjson encodes datetimes/enums itself, so models can skip the JSON-mode pass
+DUMP_MODE = "python" if orjson is not None else "json"
+
+# Files at least this large are memory-mapped instead of copied into bytes
+MMAP_THRESHOLD = 1 << 20
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize plain data to indented UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize plain data to one compact line of UTF-8 JSON (no newline)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_model(model: BaseModel, compact: bool = False) -> bytes:
+    """Serialize a model to indented (or, if compact, single-line) UTF-8 JSON bytes."""
+    data = model.model_dump(mode=DUMP_MODE)
+    return dumps_line(data) if compact else dumps(data)
+
+
+def load_model(model_class: Type[M], data: bytes) -> M:
+    """Parse and validate JSON bytes in one pass inside pydantic-core."""
+    return model_class.model_validate_json(data)
+
+
+def load_model_file(model_class: Type[M], path: Path) -> M:
+    """
+    Load and validate a model from a JSON file.
+
+    Large files are memory-mapped and parsed by orjson straight from the page
+    cache (pydantic-core only accepts str/bytes, so validation then runs on
+    the parsed data); smaller files take the single-pass bytes route.
+    """
+    if orjson is not None and path.stat().st_size >= MMAP_THRESHOLD:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
+        return model_class.model_validate(data)
+    return load_model(model_class, path.read_bytes())
@@ -4,12 +4,14 @@ Publish Ledger - File-based storage for publish records.
 Provides idempotent tracking of spec publications to external systems.
 """
 
-import json
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from canonical.config import config
+from canonical.store._io import atomic_write_bytes
+from canonical.store._json import DUMP_MODE, dumps, dumps_line, loads
 
 
 class LedgerStatus(str):
@@ -21,7 +23,13 @@ class LedgerStatus(str):
 
 
 class LedgerRecord(BaseModel):
-    """A single publish ledger record."""
+    """
+    A single publish ledger record.
+    
+    Records are immutable; a status change stores a copy with the new status.
+    """
+    model_config = ConfigDict(frozen=True, extra="forbid", defer_build=True)
+    
     ledger_id: str = Field(..., description="Unique ledger record ID")
     feature_id: str = Field(..., description="Feature identifier")
     target: str = Field(..., description="Target system (e.g., feishu)")
@@ -34,6 +42,19 @@ class LedgerRecord(BaseModel):
     mapping_version: str = Field("1.0", description="Mapping config version used")
     errors: List[str] = Field(default_factory=list, description="Any errors encountered")
 
+    @classmethod
+    def from_stored(cls, data: Dict[str, Any]) -> "LedgerRecord":
+        """
+        Rebuild a record that this ledger wrote itself, skipping validation.
+        
+        model_construct does no coercion, so the one non-JSON-native field
+        (published_at) is parsed here. Takes ownership of data.
+        """
+        published_at = data.get("published_at")
+        if isinstance(published_at, str):
+            data["published_at"] = datetime.fromisoformat(published_at)
+        return cls.model_construct(**data)
+
     @property
     def idempotent_key(self) -> str:
         """Get the idempotent key for this record."""
@@ -48,9 +69,17 @@ class Ledger:
     
     File structure:
     ledger/
-      records.json  # All records in one file for simplicity
+      records.json   # Compacted snapshot: a {"counter": N} line, then one record per line
+      records.jsonl  # Append-only log of changes since the last compaction
+    
+    Mutations append one line to records.jsonl instead of rewriting
+    records.json; the log is folded back into records.json every
+    COMPACT_EVERY operations.
     """
     
+    # Number of logged operations that triggers a compaction
+    COMPACT_EVERY = 1000
+    
     def __init__(self, base_dir: Optional[Path] = None):
         """
         Initialize the Ledger.
@@ -61,32 +90,212 @@ class Ledger:
         self.base_dir = base_dir or config.ledger_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.records_file = self.base_dir / "records.json"
+        self.wal_file = self.base_dir / "records.jsonl"
         self._records: Dict[str, LedgerRecord] = {}
+        # Secondary indexes over _records (values are idempotent keys; the
+        # inner dicts are insertion-ordered sets)
+        self._by_ledger_id: Dict[str, str] = {}
+        self._by_feature: Dict[str, Dict[str, None]] = {}
+        self._by_external: Dict[Tuple[str, str], Dict[str, None]] = {}
+        # (feature_id, target) -> key of the most recent active record
+        self._active: Dict[Tuple[str, str], str] = {}
         self._ledger_counter = 0
+        self._wal_ops = 0
+        self._wal_fd: Optional[int] = None  # Append-only handle, opened on first write
         self._load()
 
+    def close(self) -> None:
+        """Close the change-log handle (it is reopened on the next write)."""
+        if self._wal_fd is not None:
+            os.close(self._wal_fd)
+            self._wal_fd = None
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
     def _load(self) -> None:
-        """Load records from disk."""
-        if not self.records_file.exists():
-            return
-        
-        with open(self.records_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        """Load the compacted records, then replay the change log over them."""
+        if self.records_file.exists():
+            with open(self.records_file, 'rb') as f:
+                try:
+                    header = loads(f.readline() or b"{}")
+                except ValueError:
+                    # Older indented single-document layout
+                    f.seek(0)
+                    header = loads(f.read())
+                self._ledger_counter = header.get("counter", 0)
+                if "records" in header:
+                    # Older single-document layout
+                    for record_data in header["records"]:
+                        self._put(LedgerRecord.from_stored(record_data))
+                else:
+                    # One record decoded at a time, so peak memory stays near the final size
+                    for line in f:
+                        if line.strip():
+                            self._put(LedgerRecord.from_stored(loads(line)))
         
-        for record_data in data.get("records", []):
-            record = LedgerRecord.model_validate(record_data)
-            self._records[record.idempotent_key] = record
-        
-        self._ledger_counter = data.get("counter", 0)
+        if self.wal_file.exists():
+            torn = False
+            with open(self.wal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        torn = True  # Torn final line from an interrupted append
+                        continue
+                    self._apply(entry)
+                    self._wal_ops += 1
+            if torn:
+                # Compact now so later appends don't land on the torn line
+                self._save()
 
-    def _save(self) -> None:
-        """Save records to disk."""
-        data = {
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        """Apply one change-log entry to the in-memory records."""
+        op = entry.get("op")
+        if op == "put":
+            self._put(LedgerRecord.from_stored(entry["record"]))
+            self._ledger_counter = max(self._ledger_counter, entry.get("counter", 0))
+        elif op == "batch":
+            for record_data in entry["records"]:
+                self._put(LedgerRecord.from_stored(record_data))
+            self._ledger_counter = max(self._ledger_counter, entry.get("counter", 0))
+        elif op == "status":
+            key = self._by_ledger_id.get(entry["id"])
+            if key is not None:
+                self._set_status(key, entry["s"])
+        elif op == "del":
+            self._remove(entry["key"])
+        elif op == "clear":
+            self._reset()
+
+    def _put(self, record: LedgerRecord) -> None:
+        """Insert or replace a record, keeping the secondary indexes in sync."""
+        key = record.idempotent_key
+        old = self._records.get(key)
+        if old is not None and old.ledger_id != record.ledger_id:
+            # A new record under an old key moves to the end, so every view
+            # stays in creation order; updates of the same record stay put
+            self._remove(key)
+        self._records[key] = record
+        self._by_ledger_id[record.ledger_id] = key
+        self._by_feature.setdefault(record.feature_id, {})[key] = None
+        self._by_external.setdefault((record.external_id, record.target), {})[key] = None
+        self._track_active(record)
+
+    def _set_status(self, key: str, status: str) -> LedgerRecord:
+        """Swap in a copy of a record with a new status; the indexes are unchanged."""
+        record = self._records[key].model_copy(update={"status": status})
+        self._records[key] = record
+        self._track_active(record)
+        return record
+
+    def _remove(self, key: str) -> None:
+        """Remove a record and its index entries."""
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+        self._by_ledger_id.pop(record.ledger_id, None)
+        keys = self._by_feature.get(record.feature_id)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_feature[record.feature_id]
+        bucket = (record.external_id, record.target)
+        keys = self._by_external.get(bucket)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_external[bucket]
+        if self._active.get((record.feature_id, record.target)) == key:
+            self._refresh_active(record.feature_id, record.target)
+
+    def _track_active(self, record: LedgerRecord) -> None:
+        """Update the active pointer after a record was added or changed status."""
+        key = record.idempotent_key
+        pair = (record.feature_id, record.target)
+        current = self._active.get(pair)
+        if record.status == LedgerStatus.ACTIVE:
+            if current is None or (
+                current != key and self._records[current].published_at < record.published_at
+            ):
+                self._active[pair] = key
+        elif current == key:
+            self._refresh_active(record.feature_id, record.target)
+
+    def _refresh_active(self, feature_id: str, target: str) -> None:
+        """Recompute the active pointer for one (feature_id, target) pair."""
+        candidates = [
+            self._records[key] for key in self._by_feature.get(feature_id, ())
+            if self._records[key].target == target and self._records[key].status == LedgerStatus.ACTIVE
+        ]
+        if candidates:
+            self._active[(feature_id, target)] = max(candidates, key=lambda r: r.published_at).idempotent_key
+        else:
+            self._active.pop((feature_id, target), None)
+
+    def _reset(self) -> None:
+        """Drop all records, indexes and the ID counter."""
+        self._records.clear()
+        self._by_ledger_id.clear()
+        self._by_feature.clear()
+        self._by_external.clear()
+        self._active.clear()
+        self._ledger_counter = 0
+
+    def _log(self, entry: Dict[str, Any]) -> None:
+        """Append one entry to the change log, compacting when it grows large."""
+        if self._wal_fd is None:
+            self._wal_fd = os.open(self.wal_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.write(self._wal_fd, dumps_line(entry) + b"\n")
+        self._wal_ops += 1
+        if self._wal_ops >= self.COMPACT_EVERY:
+            self._save()
+
+    def _log_put(self, record: LedgerRecord) -> None:
+        """Log a created or updated record."""
+        self._log({
+            "op": "put",
             "counter": self._ledger_counter,
-            "records": [r.model_dump(mode='json') for r in self._records.values()],
+            "record": record.model_dump(mode=DUMP_MODE),
+        })
+
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """All records and the ID counter in the records.json layout."""
+        return {
+            "counter": self._ledger_counter,
+            "records": [r.model_dump(mode=DUMP_MODE) for r in self._records.values()],
         }
-        with open(self.records_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+
+    def _save(self) -> None:
+        """Compact: write all records to records.json and reset the change log."""
+        # Compact JSON lines; use export_pretty for a human-readable copy
+        lines = [dumps_line({"counter": self._ledger_counter})]
+        lines.extend(dumps_line(r.model_dump(mode=DUMP_MODE)) for r in self._records.values())
+        lines.append(b"")
+        atomic_write_bytes(self.records_file, b"\n".join(lines))
+        # Replaying the log over the new snapshot is idempotent, so a crash
+        # before this truncation loses nothing
+        if self._wal_fd is not None:
+            os.ftruncate(self._wal_fd, 0)  # O_APPEND writes continue at the new end
+        else:
+            self.wal_file.write_bytes(b"")
+        self._wal_ops = 0
+
+    def export_pretty(self, path: Path) -> int:
+        """
+        Write all records to path as indented, human-readable JSON.
+        
+        Args:
+            path: Output file path
+            
+        Returns:
+            Number of records exported
+        """
+        path.write_bytes(dumps(self._snapshot_data()))
+        return len(self._records)
 
     def create(
         self,
@@ -115,13 +324,64 @@ class Ledger:
         Returns:
             The created or existing LedgerRecord
         """
+        record, is_new = self._add_record(
+            feature_id, target, spec_version, external_id, operation,
+            field_map_snapshot, mapping_version,
+        )
+        if is_new:
+            self._log_put(record)
+        
+        return record
+
+    def create_many(self, entries: List[Dict[str, Any]]) -> List[LedgerRecord]:
+        """
+        Create several ledger records with a single log write.
+        
+        Each entry holds create()'s keyword arguments. The new records are
+        logged as one line, so after a crash either the whole batch is
+        replayed or none of it is.
+        
+        Args:
+            entries: One dict of create() arguments per record
+            
+        Returns:
+            The created or existing LedgerRecords, in entry order
+        """
+        records = []
+        new_records = []
+        for entry in entries:
+            record, is_new = self._add_record(**entry)
+            records.append(record)
+            if is_new:
+                new_records.append(record)
+        
+        if new_records:
+            self._log({
+                "op": "batch",
+                "counter": self._ledger_counter,
+                "records": [r.model_dump(mode=DUMP_MODE) for r in new_records],
+            })
+        
+        return records
+
+    def _add_record(
+        self,
+        feature_id: str,
+        target: str,
+        spec_version: str,
+        external_id: str,
+        operation: str,
+        field_map_snapshot: Optional[Dict[str, Any]] = None,
+        mapping_version: str = "1.0",
+    ) -> Tuple[LedgerRecord, bool]:
+        """Add a record in memory; returns (record, False) if an active one already exists."""
         key = f"{feature_id}:{target}:{spec_version}"
         
         # Check for existing record (idempotency)
         if key in self._records:
             existing = self._records[key]
             if existing.status == LedgerStatus.ACTIVE:
-                return existing
+                return existing, False
         
         # Generate new ledger ID
         self._ledger_counter += 1
@@ -140,10 +400,8 @@ class Ledger:
             mapping_version=mapping_version,
         )
         
-        self._records[key] = record
-        self._save()
-        
-        return record
+        self._put(record)
+        return record, True
 
     def get(
         self,
@@ -175,10 +433,8 @@ class Ledger:
         Returns:
             The LedgerRecord if found, None otherwise
         """
-        for record in self._records.values():
-            if record.ledger_id == ledger_id:
-                return record
-        return None
+        key = self._by_ledger_id.get(ledger_id)
+        return self._records.get(key) if key is not None else None
 
     def find_by_feature(self, feature_id: str) -> List[LedgerRecord]:
         """
@@ -190,10 +446,7 @@ class Ledger:
         Returns:
             List of LedgerRecords for the feature
         """
-        return [
-            r for r in self._records.values()
-            if r.feature_id == feature_id
-        ]
+        return [self._records[key] for key in self._by_feature.get(feature_id, ())]
 
     def find_by_external_id(self, external_id: str, target: str = "feishu") -> List[LedgerRecord]:
         """
@@ -206,10 +459,7 @@ class Ledger:
         Returns:
             List of LedgerRecords for the external ID
         """
-        return [
-            r for r in self._records.values()
-            if r.external_id == external_id and r.target == target
-        ]
+        return [self._records[key] for key in self._by_external.get((external_id, target), ())]
 
     def find_active_by_feature(self, feature_id: str, target: str = "feishu") -> Optional[LedgerRecord]:
         """
@@ -222,14 +472,9 @@ class Ledger:
         Returns:
             The active LedgerRecord if found, None otherwise
         """
-        records = [
-            r for r in self._records.values()
-            if r.feature_id == feature_id and r.target == target and r.status == LedgerStatus.ACTIVE
-        ]
-        if not records:
-            return None
-        # Return the most recent one
-        return max(records, key=lambda r: r.published_at)
+        # Most recent active record, maintained as records change
+        key = self._active.get((feature_id, target))
+        return self._records[key] if key is not None else None
 
     def update_status(self, ledger_id: str, status: str) -> Optional[LedgerRecord]:
         """
@@ -242,16 +487,15 @@ class Ledger:
         Returns:
             The updated LedgerRecord if found, None otherwise
         """
-        record = self.get_by_ledger_id(ledger_id)
-        if not record:
+        key = self._by_ledger_id.get(ledger_id)
+        if key is None:
             return None
         
-        # Update the record in the dict
-        key = record.idempotent_key
-        self._records[key].status = status
-        self._save()
+        # Only the status change is logged, not the whole record
+        record = self._set_status(key, status)
+        self._log({"op": "status", "id": ledger_id, "s": status})
         
-        return self._records[key]
+        return record
 
     def list_all(self) -> List[LedgerRecord]:
         """
@@ -277,8 +521,8 @@ class Ledger:
             return False
         
         key = record.idempotent_key
-        del self._records[key]
-        self._save()
+        self._remove(key)
+        self._log({"op": "del", "key": key})
         
         return True
 
@@ -290,7 +534,8 @@ class Ledger:
             Number of records deleted
         """
         count = len(self._records)
-        self._records.clear()
-        self._ledger_counter = 0
+        self._reset()
+        # Log the clear first so an interrupted compaction still replays it
+        self._log({"op": "clear"})
         self._save()
         return count
@@ -4,12 +4,92 @@ Snapshot Store - File-based storage for Step Snapshots.
 Provides storage for pipeline execution snapshots for audit and replay.
 """
 
-import json
+import atexit
+import logging
+import os
+import queue
+import threading
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, Iterator, List, Optional, Dict, Tuple
 from canonical.models.snapshot import StepSnapshot
 from canonical.config import config
+from canonical.store._io import atomic_write_bytes
+from canonical.store._json import dump_model, dumps_line, load_model_file, loads
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIXES = (".msgpack", ".json")
+
+# Max parsed snapshots kept in memory (shared across stores)
+SNAPSHOT_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_SIZE)
+def _read_cached(path: str, mtime_ns: int, size: int) -> StepSnapshot:
+    """
+    Parse a snapshot file once per (path, mtime, size).
+
+    A rewritten file gets a new key, so stale entries simply stop being hit.
+    Cached snapshots are shared between callers and must not be mutated.
+    """
+    file_path = Path(path)
+    if file_path.suffix == ".msgpack":
+        if msgpack is None:
+            raise RuntimeError(f"msgpack is required to read {file_path}")
+        return StepSnapshot.model_validate(msgpack.unpackb(file_path.read_bytes(), raw=False))
+    return load_model_file(StepSnapshot, file_path)
+
+
+class _WriteQueue:
+    """
+    One background thread that encodes and writes snapshots in FIFO order.
+    
+    A single worker keeps writes within a run directory in save() order.
+    Write errors are kept and re-raised by the next flush().
+    """
+    
+    def __init__(self, encode: Callable[[StepSnapshot], bytes]):
+        self._encode = encode
+        self._queue: "queue.Queue[Tuple[Path, StepSnapshot]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    def put(self, file_path: Path, snapshot: StepSnapshot) -> None:
+        """Queue a snapshot write, starting the worker on first use."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)  # Daemon threads die at exit; drain first
+        self._queue.put((file_path, snapshot))
+
+    def flush(self) -> None:
+        """Block until every queued snapshot is on disk; re-raise the first write error."""
+        if self._thread is not None:
+            self._queue.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            file_path, snapshot = self._queue.get()
+            try:
+                atomic_write_bytes(file_path, self._encode(snapshot))
+            except BaseException as e:
+                if self._error is None:
+                    self._error = e
+            finally:
+                self._queue.task_done()
 
 
 class SnapshotStore:
@@ -19,10 +99,22 @@ class SnapshotStore:
     Directory structure:
     snapshots/
       R-20260113-0001/
-        step_001_ingest.json
-        step_002_compile.json
+        step_001_ingest.msgpack
+        step_002_compile.msgpack
       R-20260113-0002/
         step_001_ingest.json
+
+    by_feature.jsonl is an append-only feature -> run index. It is loaded on
+    first use (not in the constructor) and rebuilt from the run directories
+    when missing; unreadable step files are skipped with a warning.
+
+    Snapshots are written as MessagePack when the msgpack package is
+    installed and config.snapshot_format is "msgpack"; otherwise as JSON.
+    Both formats are always readable.
+
+    With config.snapshot_async_writes, save() queues the write on a
+    background thread and returns the path at once; reads and delete()
+    flush pending writes first, and flush() can be called explicitly.
     """
     
     def __init__(self, base_dir: Optional[Path] = None):
@@ -35,6 +127,172 @@ class SnapshotStore:
         self.base_dir = base_dir or config.snapshots_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self._run_counters: Dict[str, int] = {}  # date -> last run number
+        self._use_msgpack = msgpack is not None and config.snapshot_format == "msgpack"
+        self._writer = _WriteQueue(self._encode) if config.snapshot_async_writes else None
+        
+        # feature -> run index, replayed from by_feature.jsonl up to _index_offset
+        self.index_file = self.base_dir / "by_feature.jsonl"
+        self._run_feature: Dict[str, str] = {}
+        self._by_feature: Dict[str, List[str]] = {}
+        self._index_offset = 0
+        self._index_loaded = False
+        self._index_lock = threading.Lock()
+
+    def _ensure_index(self) -> None:
+        """Load by_feature.jsonl on first use, rebuilding it if it does not exist yet."""
+        if self._index_loaded:
+            return
+        with self._index_lock:
+            if not self._index_loaded:
+                if not self.index_file.exists():
+                    self._rebuild_index()
+                self._sync_index()
+                self._index_loaded = True
+
+    def _index_apply(self, entry: Dict) -> None:
+        """Apply one index entry; replaying an entry twice is harmless."""
+        run_id = entry["run_id"]
+        if entry.get("del"):
+            feature_id = self._run_feature.pop(run_id, None)
+            if feature_id is not None:
+                self._by_feature[feature_id].remove(run_id)
+        elif run_id not in self._run_feature:
+            self._run_feature[run_id] = entry["feature_id"]
+            self._by_feature.setdefault(entry["feature_id"], []).append(run_id)
+
+    def _index_append(self, *entries: Dict) -> None:
+        """Append index entries in one write; they are applied on the next _sync_index."""
+        with open(self.index_file, "ab") as f:
+            f.write(b"".join(dumps_line(entry) + b"\n" for entry in entries))
+
+    def _sync_index(self) -> None:
+        """Replay index entries appended since the last sync (by any process)."""
+        try:
+            size = self.index_file.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._index_offset:
+            return
+        with open(self.index_file, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read(size - self._index_offset)
+        end = data.rfind(b"\n") + 1  # Leave a partially written last line for later
+        for line in data[:end].splitlines():
+            if line.strip():
+                try:
+                    self._index_apply(loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    logger.warning("Skipping malformed entry in %s: %r", self.index_file, line[:200])
+        self._index_offset += end
+
+    def _rebuild_index(self) -> None:
+        """
+        Create by_feature.jsonl from the run directories.
+        
+        Each run is indexed from its first readable step file. The finished
+        file is published with os.link, which fails if another process created
+        the index meanwhile; our entries are then appended to theirs instead of
+        replacing it, so no concurrent append is lost (replaying an entry twice
+        is harmless).
+        """
+        lines = []
+        for run_id in sorted(self._run_dirs()):
+            for file_path in sorted(self._step_files(self.base_dir / run_id)):
+                feature_id = self._peek_feature_id(file_path)
+                if feature_id:
+                    lines.append(dumps_line({"run_id": run_id, "feature_id": feature_id}) + b"\n")
+                    break
+        data = b"".join(lines)
+        
+        tmp_path = self.index_file.with_name(f"{self.index_file.name}.tmp.{os.getpid()}")
+        tmp_path.write_bytes(data)
+        try:
+            os.link(tmp_path, self.index_file)
+        except FileExistsError:
+            if data:
+                with open(self.index_file, "ab") as f:
+                    f.write(data)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _index_runs(self, snapshots: List[StepSnapshot]) -> None:
+        """Record each run's feature the first time the run is saved to."""
+        # Build the index before the first append; appending would otherwise
+        # create the file and hide the runs that were never indexed
+        self._ensure_index()
+        entries = {}
+        for snapshot in snapshots:
+            if snapshot.run_id not in self._run_feature and snapshot.run_id not in entries:
+                entries[snapshot.run_id] = {"run_id": snapshot.run_id, "feature_id": snapshot.feature_id}
+        if entries:
+            self._index_append(*entries.values())
+            for entry in entries.values():
+                self._index_apply(entry)
+
+    def _filename(self, snapshot: StepSnapshot) -> str:
+        """Build the file name from the sequence number and step name."""
+        suffix = ".msgpack" if self._use_msgpack else ".json"
+        return f"step_{snapshot.step.seq:03d}_{snapshot.step.name.value}{suffix}"
+
+    def _encode(self, snapshot: StepSnapshot) -> bytes:
+        """Serialize a snapshot in the configured on-disk format."""
+        if self._use_msgpack:
+            # JSON mode keeps datetimes as ISO strings; msgpack timestamps need tz-aware values
+            return msgpack.packb(snapshot.model_dump(mode="json"), use_bin_type=True)
+        return dump_model(snapshot, compact=True)  # Machine-read audit data; skip indentation
+
+    @staticmethod
+    def _read(file_path: Path) -> StepSnapshot:
+        """Load a snapshot file (cached), choosing the decoder by file suffix."""
+        st = file_path.stat()
+        return _read_cached(str(file_path), st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _peek_feature_id(file_path: Path) -> Optional[str]:
+        """
+        Read a snapshot file's feature_id without validating the snapshot.
+        
+        Returns None (with a warning) for files that cannot be read or decoded,
+        e.g. a truncated file or a .msgpack file without msgpack installed.
+        """
+        try:
+            data = file_path.read_bytes()
+            if file_path.suffix == ".msgpack":
+                if msgpack is None:
+                    raise RuntimeError(f"msgpack is required to read {file_path}")
+                payload = msgpack.unpackb(data, raw=False)
+            else:
+                payload = loads(data)
+        except (ValueError, RuntimeError, OSError) as e:
+            logger.warning("Skipping unreadable snapshot %s: %s", file_path, e)
+            return None
+        return payload.get("feature_id") if isinstance(payload, dict) else None
+
+    @staticmethod
+    def _step_files(run_dir: Path, prefix: str = "step_", stem_suffix: str = "") -> List[Path]:
+        """List snapshot files in a run directory (either format) by name prefix/stem suffix."""
+        files = []
+        try:
+            with os.scandir(run_dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext in SNAPSHOT_SUFFIXES and stem.startswith(prefix) and stem.endswith(stem_suffix):
+                        files.append(run_dir / entry.name)
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _write(self, file_path: Path, snapshot: StepSnapshot) -> None:
+        """Write a snapshot now, or queue it when async writes are enabled."""
+        if self._writer is not None:
+            self._writer.put(file_path, snapshot)
+        else:
+            atomic_write_bytes(file_path, self._encode(snapshot))
+
+    def flush(self) -> None:
+        """Wait for queued snapshot writes to finish (no-op for synchronous writes)."""
+        if self._writer is not None:
+            self._writer.flush()
 
     def save(self, snapshot: StepSnapshot) -> str:
         """
@@ -49,15 +307,46 @@ class SnapshotStore:
         run_dir = self.base_dir / snapshot.run_id
         run_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create filename with sequence number and step name
-        filename = f"step_{snapshot.step.seq:03d}_{snapshot.step.name.value}.json"
-        file_path = run_dir / filename
+        file_path = run_dir / self._filename(snapshot)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(snapshot.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        self._write(file_path, snapshot)
+        self._index_runs([snapshot])
         
         return str(file_path)
 
+    def save_many(self, snapshots: List[StepSnapshot]) -> List[str]:
+        """
+        Save several step snapshots.
+        
+        Each run directory is created once, and the index entries for new
+        runs are appended in a single write after the snapshot files. This
+        is not all-or-nothing: if a write fails, the snapshots written
+        before it stay on disk (and are indexed) and the error propagates.
+        
+        Args:
+            snapshots: The StepSnapshots to save
+            
+        Returns:
+            The file paths where the snapshots were saved, in input order
+        """
+        run_dirs: Dict[str, Path] = {}
+        paths = []
+        try:
+            for snapshot in snapshots:
+                run_dir = run_dirs.get(snapshot.run_id)
+                if run_dir is None:
+                    run_dir = self.base_dir / snapshot.run_id
+                    run_dir.mkdir(parents=True, exist_ok=True)
+                    run_dirs[snapshot.run_id] = run_dir
+                
+                file_path = run_dir / self._filename(snapshot)
+                self._write(file_path, snapshot)
+                paths.append(str(file_path))
+        finally:
+            self._index_runs(snapshots[:len(paths)])
+        
+        return paths
+
     def load(self, run_id: str, step_seq: int) -> Optional[StepSnapshot]:
         """
         Load a specific step snapshot.
@@ -69,20 +358,13 @@ class SnapshotStore:
         Returns:
             The loaded StepSnapshot, or None if not found
         """
-        run_dir = self.base_dir / run_id
-        if not run_dir.exists():
-            return None
-        
+        self.flush()
         # Find file with matching sequence number
-        pattern = f"step_{step_seq:03d}_*.json"
-        files = list(run_dir.glob(pattern))
+        files = self._step_files(self.base_dir / run_id, prefix=f"step_{step_seq:03d}_")
         if not files:
             return None
         
-        with open(files[0], 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return StepSnapshot.model_validate(data)
+        return self._read(files[0])
 
     def load_by_name(self, run_id: str, step_name: str) -> Optional[StepSnapshot]:
         """
@@ -95,22 +377,14 @@ class SnapshotStore:
         Returns:
             The loaded StepSnapshot, or None if not found
         """
-        run_dir = self.base_dir / run_id
-        if not run_dir.exists():
-            return None
-        
+        self.flush()
         # Find file with matching step name
-        pattern = f"step_*_{step_name}.json"
-        files = list(run_dir.glob(pattern))
+        files = self._step_files(self.base_dir / run_id, stem_suffix=f"_{step_name}")
         if not files:
             return None
         
         # Return the most recent one (highest sequence number)
-        files.sort(reverse=True)
-        with open(files[0], 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return StepSnapshot.model_validate(data)
+        return self._read(max(files))
 
     def list_snapshots(self, run_id: str) -> List[StepSnapshot]:
         """
@@ -122,29 +396,39 @@ class SnapshotStore:
         Returns:
             List of StepSnapshots, sorted by sequence number (ascending)
         """
-        run_dir = self.base_dir / run_id
-        if not run_dir.exists():
-            return []
-        
-        snapshots = []
-        for file_path in sorted(run_dir.glob("step_*.json")):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            snapshots.append(StepSnapshot.model_validate(data))
+        return list(self.iter_snapshots(run_id))
+
+    def iter_snapshots(self, run_id: str) -> Iterator[StepSnapshot]:
+        """
+        Yield the snapshots of a run one at a time, sorted by sequence number.
         
-        return snapshots
+        Args:
+            run_id: The run identifier
+            
+        Yields:
+            StepSnapshots, sorted by sequence number (ascending)
+        """
+        self.flush()
+        for file_path in sorted(self._step_files(self.base_dir / run_id)):
+            yield self._read(file_path)
+
+    def _run_dirs(self) -> List[str]:
+        """List run directory names, including runs reserved but not yet saved to."""
+        with os.scandir(self.base_dir) as it:
+            return [e.name for e in it if e.name.startswith("R-") and e.is_dir()]
 
     def list_runs(self) -> List[str]:
         """
         List all run IDs in the store.
         
+        Run directories reserved by generate_run_id() that never got a
+        snapshot (e.g. the command failed first) are not runs and are skipped.
+        
         Returns:
             List of run_ids, sorted descending (newest first)
         """
-        runs = []
-        for path in self.base_dir.iterdir():
-            if path.is_dir() and path.name.startswith("R-"):
-                runs.append(path.name)
+        self.flush()
+        runs = [run_id for run_id in self._run_dirs() if self._step_files(self.base_dir / run_id)]
         return sorted(runs, reverse=True)
 
     def list_runs_for_feature(self, feature_id: str) -> List[str]:
@@ -155,15 +439,11 @@ class SnapshotStore:
             feature_id: The feature identifier
             
         Returns:
-            List of run_ids for the feature
+            List of run_ids for the feature, sorted descending (newest first)
         """
-        matching_runs = []
-        for run_id in self.list_runs():
-            # Check first snapshot to see if it matches the feature
-            snapshots = self.list_snapshots(run_id)
-            if snapshots and snapshots[0].feature_id == feature_id:
-                matching_runs.append(run_id)
-        return matching_runs
+        self._ensure_index()
+        self._sync_index()
+        return sorted(self._by_feature.get(feature_id, ()), reverse=True)
 
     def exists(self, run_id: str) -> bool:
         """
@@ -173,10 +453,10 @@ class SnapshotStore:
             run_id: The run identifier
             
         Returns:
-            True if the run exists
+            True if the run has at least one snapshot
         """
-        run_dir = self.base_dir / run_id
-        return run_dir.exists()
+        self.flush()
+        return bool(self._step_files(self.base_dir / run_id))
 
     def delete(self, run_id: str) -> bool:
         """
@@ -188,12 +468,16 @@ class SnapshotStore:
         Returns:
             True if something was deleted
         """
+        self.flush()
         run_dir = self.base_dir / run_id
         if not run_dir.exists():
             return False
         
         import shutil
         shutil.rmtree(run_dir)
+        self._ensure_index()
+        self._index_append({"run_id": run_id, "del": True})
+        self._index_apply({"run_id": run_id, "del": True})
         return True
 
     def generate_run_id(self) -> str:
@@ -205,20 +489,33 @@ class SnapshotStore:
         today = datetime.utcnow().strftime("%Y%m%d")
         prefix = f"R-{today}-"
         
-        max_num = 0
-        for run_dir in self.base_dir.iterdir():
-            if run_dir.is_dir() and run_dir.name.startswith(prefix):
-                try:
-                    num = int(run_dir.name.split("-")[-1])
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-        
-        # Also check in-memory counter
-        if today in self._run_counters:
-            max_num = max(max_num, self._run_counters[today])
-        
-        next_num = max_num + 1
-        self._run_counters[today] = next_num
+        # Directory scan only on the first ID of the day; afterwards count in memory
+        num = self._run_counters.get(today)
+        if num is None:
+            num = self._scan_max_run_num(prefix)
+        num += 1
+        # Reserve the run directory atomically, skipping numbers another
+        # process has taken since the scan (runs may execute concurrently)
+        while True:
+            try:
+                (self.base_dir / f"{prefix}{num:04d}").mkdir()
+                break
+            except FileExistsError:
+                num += 1
+        self._run_counters[today] = num
         
-        return f"R-{today}-{next_num:04d}"
+        return f"{prefix}{num:04d}"
+
+    def _scan_max_run_num(self, prefix: str) -> int:
+        """Return the highest run number on disk for a date prefix (0 if none)."""
+        max_num = 0
+        start = len(prefix)
+        with os.scandir(self.base_dir) as it:
+            for entry in it:
+                # Slice the counter after the prefix (no split(), and wider numbers still parse)
+                digits = entry.name[start:]
+                if entry.name.startswith(prefix) and digits.isdigit() and entry.is_dir():
+                    num = int(digits)
+                    if num > max_num:
+                        max_num = num
+        return max_num
@@ -7,12 +7,14 @@ Provides versioned, immutable storage of specs with support for:
 - List all versions for a feature
 """
 
-import json
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict
 from canonical.models.spec import CanonicalSpec
 from canonical.config import config
+from canonical.store._io import atomic_write_bytes
+from canonical.store._json import dump_model, load_model_file
 
 
 class SpecStore:
@@ -37,7 +39,8 @@ class SpecStore:
         """
         self.base_dir = base_dir or config.specs_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
-        self._version_counters: Dict[str, int] = {}  # feature_id -> last version number
+        self._version_counters: Dict[str, int] = {}  # "feature_id:date" -> last version number
+        self._feature_counters: Dict[str, int] = {}  # year -> last feature number
 
     def save(self, spec: CanonicalSpec) -> str:
         """
@@ -75,11 +78,29 @@ class SpecStore:
         
         # Save to file
         file_path = feature_dir / f"{spec_version}.json"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        atomic_write_bytes(file_path, dump_model(spec))
         
         return spec_version
 
+    def overwrite(self, spec: CanonicalSpec) -> bool:
+        """
+        Rewrite an existing spec version in place (e.g. a status update).
+        
+        The file is replaced atomically, so readers see either the old or
+        the new document, never a partial one.
+        
+        Args:
+            spec: The CanonicalSpec to write; spec.meta.spec_version must be set
+            
+        Returns:
+            True if the version existed and was rewritten
+        """
+        file_path = self.base_dir / spec.feature.feature_id / f"{spec.meta.spec_version}.json"
+        if not file_path.exists():
+            return False
+        atomic_write_bytes(file_path, dump_model(spec))
+        return True
+
     def load(self, feature_id: str, spec_version: Optional[str] = None) -> Optional[CanonicalSpec]:
         """
         Load a spec by feature_id and optional version.
@@ -97,19 +118,15 @@ class SpecStore:
         
         if spec_version is None:
             # Load latest version
-            versions = self.list_versions(feature_id)
-            if not versions:
+            spec_version = self.latest_version(feature_id)
+            if spec_version is None:
                 return None
-            spec_version = versions[0]  # Most recent
         
         file_path = feature_dir / f"{spec_version}.json"
         if not file_path.exists():
             return None
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return CanonicalSpec.model_validate(data)
+        return load_model_file(CanonicalSpec, file_path)
 
     def list_versions(self, feature_id: str) -> List[str]:
         """
@@ -121,19 +138,41 @@ class SpecStore:
         Returns:
             List of spec_versions, sorted descending (newest first)
         """
-        feature_dir = self.base_dir / feature_id
-        if not feature_dir.exists():
-            return []
-        
-        versions = []
-        for file_path in feature_dir.glob("S-*.json"):
-            version = file_path.stem
-            versions.append(version)
-        
+        versions = self._scan_versions(feature_id)
         # Sort descending (newest first) - versions are sortable as strings
         versions.sort(reverse=True)
         return versions
 
+    def latest_version(self, feature_id: str) -> Optional[str]:
+        """
+        Get the newest version of a feature without sorting all versions.
+        
+        Args:
+            feature_id: The feature identifier
+            
+        Returns:
+            The latest spec_version, or None if the feature has none
+        """
+        # Single pass over the directory, keeping only the best name so far
+        best = None
+        try:
+            with os.scandir(self.base_dir / feature_id) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith("S-") and name.endswith(".json") and (best is None or name > best):
+                        best = name
+        except FileNotFoundError:
+            return None
+        return best[:-5] if best is not None else None
+
+    def _scan_versions(self, feature_id: str) -> List[str]:
+        """Return a feature's spec_versions in directory order."""
+        try:
+            with os.scandir(self.base_dir / feature_id) as it:
+                return [e.name[:-5] for e in it if e.name.startswith("S-") and e.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
     def list_features(self) -> List[str]:
         """
         List all feature IDs in the store.
@@ -141,10 +180,8 @@ class SpecStore:
         Returns:
             List of feature_ids
         """
-        features = []
-        for path in self.base_dir.iterdir():
-            if path.is_dir() and path.name.startswith("F-"):
-                features.append(path.name)
+        with os.scandir(self.base_dir) as it:
+            features = [e.name for e in it if e.name.startswith("F-") and e.is_dir()]
         return sorted(features)
 
     def exists(self, feature_id: str, spec_version: Optional[str] = None) -> bool:
@@ -163,8 +200,9 @@ class SpecStore:
             return False
         
         if spec_version is None:
-            # Check if any version exists
-            return bool(list(feature_dir.glob("S-*.json")))
+            # Check if any version exists (stops at the first match)
+            with os.scandir(feature_dir) as it:
+                return any(e.name.startswith("S-") and e.name.endswith(".json") for e in it)
         
         file_path = feature_dir / f"{spec_version}.json"
         return file_path.exists()
@@ -204,30 +242,41 @@ class SpecStore:
         Format: S-YYYYMMDD-NNNN where NNNN is a sequential counter.
         """
         today = datetime.utcnow().strftime("%Y%m%d")
-        
-        # Get the highest existing version number for today
         feature_dir = self.base_dir / feature_id
         prefix = f"S-{today}-"
         
-        max_num = 0
-        if feature_dir.exists():
-            for file_path in feature_dir.glob(f"{prefix}*.json"):
-                version = file_path.stem
-                try:
-                    num = int(version.split("-")[-1])
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-        
-        # Also check in-memory counter
+        # Directory scan only on the first version per feature and day
         counter_key = f"{feature_id}:{today}"
-        if counter_key in self._version_counters:
-            max_num = max(max_num, self._version_counters[counter_key])
-        
-        next_num = max_num + 1
-        self._version_counters[counter_key] = next_num
-        
-        return f"S-{today}-{next_num:04d}"
+        num = self._version_counters.get(counter_key)
+        if num is None:
+            num = self._scan_max_version_num(feature_dir, prefix)
+        num += 1
+        # Skip numbers another process has taken since the scan
+        while (feature_dir / f"{prefix}{num:04d}.json").exists():
+            num += 1
+        self._version_counters[counter_key] = num
+        
+        return f"{prefix}{num:04d}"
+
+    @staticmethod
+    def _scan_max_version_num(feature_dir: Path, prefix: str) -> int:
+        """Return the highest version number on disk for a date prefix (0 if none)."""
+        max_num = 0
+        start = len(prefix)
+        try:
+            with os.scandir(feature_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith(prefix) and name.endswith(".json"):
+                        # Slice the counter after the prefix (no split(), and wider numbers still parse)
+                        digits = name[start:-5]
+                        if digits.isdigit():
+                            num = int(digits)
+                            if num > max_num:
+                                max_num = num
+        except FileNotFoundError:
+            pass
+        return max_num
 
     def generate_feature_id(self) -> str:
         """
@@ -238,14 +287,27 @@ class SpecStore:
         year = datetime.utcnow().strftime("%Y")
         prefix = f"F-{year}-"
         
+        # Directory scan only on the first ID of the year; afterwards count in memory
+        num = self._feature_counters.get(year)
+        if num is None:
+            num = self._scan_max_feature_num(prefix)
+        num += 1
+        # Skip numbers another process has taken since the scan
+        while (self.base_dir / f"{prefix}{num:03d}").exists():
+            num += 1
+        self._feature_counters[year] = num
+        
+        return f"{prefix}{num:03d}"
+
+    def _scan_max_feature_num(self, prefix: str) -> int:
+        """Return the highest feature number on disk for a year prefix (0 if none)."""
         max_num = 0
-        for feature_dir in self.base_dir.iterdir():
-            if feature_dir.is_dir() and feature_dir.name.startswith(prefix):
-                try:
-                    num = int(feature_dir.name.split("-")[-1])
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-        
-        next_num = max_num + 1
-        return f"F-{year}-{next_num:03d}"
+        start = len(prefix)
+        with os.scandir(self.base_dir) as it:
+            for entry in it:
+                digits = entry.name[start:]
+                if entry.name.startswith(prefix) and digits.isdigit() and entry.is_dir():
+                    num = int(digits)
+                    if num > max_num:
+                        max_num = num
+        return max_num
@@ -9,96 +9,257 @@ Plan to Feishu - 将计划文档转换为飞书需求条目
 """
 
 import argparse
+import atexit
 import json
+import os
 import subprocess
 import sys
-import tempfile
-from datetime import datetime
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from types import SimpleNamespace
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import re
-import yaml
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+
+# 脚本目录与项目根目录（canonical 包所在目录），模块加载时计算一次并加入 sys.path
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT = os.path.dirname(_SCRIPT_DIR)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+
+# 计划文档各段落的正则（模块加载时编译一次）
+# 章节正文用“受限贪婪”写法：逐字符前进直到遇到下一个标题或文本末尾，扫描为线性，
+# 不依赖惰性匹配 + 多分支前瞻的回溯（调用方传入的正文已 strip，末尾即 \Z）
+_RE_ROOT_CAUSE = re.compile(r'### Root Cause\s+((?:(?!### Evidence|### Issues|## ).)*)', re.DOTALL)
+_RE_ISSUES = re.compile(r'### Issues Reported in Meeting\s+((?:(?!## ).)*)', re.DOTALL)
+
+# 简单 frontmatter 行：顶层 "key: 标量"（双引号无转义、单引号、或不含 ": " / "#" 的普通值）
+_RE_FM_SIMPLE_LINE = re.compile(
+    r'(?P<key>[A-Za-z_][\w-]*):'
+    r'(?:[ \t]+(?:"(?P<dq>[^"\\\n]*)"|\'(?P<sq>[^\'\n]*)\'|(?P<plain>[^\s"\'\[\]{}&*!|>%@`#,?:-](?:(?!: | #)[^\n])*?)))?'
+    r'[ \t]*'
+)
+
+# 已知阶段标题（编号 -> 名称），一次 finditer 扫描找出文档中出现的阶段
+_PHASE_TITLES = {1: 'Sync Logic Enhancement', 2: 'Data Repair Script', 3: 'Validate and Test'}
+_RE_PHASES = re.compile(
+    r'### Phase (?P<num>[123]): (?P<name>Sync Logic Enhancement|Data Repair Script|Validate and Test)(?=\s|\Z)'
+)
+
+
+# _canonical() 的缓存：导入成功后为模块句柄，失败后为 False
+_CANONICAL: Any = None
+
+
+def _load_json(data: bytes) -> Any:
+    """解析 JSON 字节，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_json(obj: Any) -> bytes:
+    """序列化为缩进 2 格的 UTF-8 JSON 字节，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _canonical() -> Optional[SimpleNamespace]:
+    """一次性导入所需的 canonical 组件；导入失败时只警告一次并返回 None"""
+    global _CANONICAL
+    if _CANONICAL is None:
+        try:
+            from canonical.store.spec_store import SpecStore
+            from canonical.engine.gate import GateEngine
+            from canonical.models.spec import ProjectContextRef
+            from canonical.store._io import atomic_write_bytes
+        except ImportError as e:
+            print(f"警告: 无法导入 canonical 模块: {e}", file=sys.stderr)
+            import traceback
+            traceback.print_exc()
+            _CANONICAL = False
+        else:
+            _CANONICAL = SimpleNamespace(
+                SpecStore=SpecStore,
+                GateEngine=GateEngine,
+                ProjectContextRef=ProjectContextRef,
+                atomic_write_bytes=atomic_write_bytes,
+            )
+    return _CANONICAL or None
+
+
+# 整个运行期间共用的 SpecStore（各辅助函数与并发阶段共享）
+_SPEC_STORE = None
+_SPEC_STORE_LOCK = threading.Lock()
+
+
+def _spec_store():
+    """返回共用的 SpecStore，首次调用时创建；canonical 不可用时返回 None"""
+    global _SPEC_STORE
+    if _SPEC_STORE is None:
+        c = _canonical()
+        if c is None:
+            return None
+        with _SPEC_STORE_LOCK:
+            if _SPEC_STORE is None:
+                _SPEC_STORE = c.SpecStore()
+    return _SPEC_STORE
+
+
+@dataclass(slots=True, frozen=True)
 class Phase:
     """表示一个阶段"""
-    
-    def __init__(self, number: int, name: str, goal: str, tasks: List[Dict[str, str]], 
-                 acceptance_criteria: List[str], affected_files: List[str],
-                 background: str):
-        self.number = number
-        self.name = name
-        self.goal = goal
-        self.tasks = tasks
-        self.acceptance_criteria = acceptance_criteria
-        self.affected_files = affected_files
-        self.background = background
+    number: int
+    name: str
+    goal: str
+    tasks: List[Dict[str, str]]
+    acceptance_criteria: List[str]
+    affected_files: List[str]
+    background: str
+
+
+# YAML 的 null 写法：未加引号时 yaml.safe_load 解析为 None
+_YAML_NULLS = frozenset(('null', 'Null', 'NULL', '~'))
 
 
-def parse_frontmatter(content: str) -> Dict[str, Any]:
-    """解析 YAML frontmatter"""
+def _parse_simple_frontmatter(text: str) -> Optional[Dict[str, Any]]:
+    """
+    不经 PyYAML 解析仅含顶层标量的 frontmatter，只提取下游使用的 overview。
+
+    存在嵌套结构、列表或其他复杂写法时返回 None，由调用方回退到 yaml.safe_load。
+    """
+    result: Dict[str, Any] = {}
+    for line in text.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        m = _RE_FM_SIMPLE_LINE.fullmatch(line)
+        if m is None:
+            return None
+        if m['key'] == 'overview':
+            value = m['dq'] if m['dq'] is not None else m['sq'] if m['sq'] is not None else m['plain']
+            if m['plain'] in _YAML_NULLS:
+                value = None
+            result['overview'] = value  # 无值或 null 时为 None，与 yaml.safe_load 一致
+    return result
+
+
+def parse_frontmatter(content: str) -> Tuple[Dict[str, Any], int]:
+    """解析 YAML frontmatter，返回 (frontmatter, 正文起始偏移)"""
     if not content.startswith('---'):
-        return {}
+        return {}, 0
     
     end = content.find('---', 3)
     if end == -1:
-        return {}
+        return {}, 0
     
     frontmatter_text = content[3:end].strip()
+    if not frontmatter_text:
+        return {}, end + 3
+    
+    simple = _parse_simple_frontmatter(frontmatter_text)
+    if simple is not None:
+        return simple, end + 3
+    
+    import yaml  # 仅在 frontmatter 含复杂结构时加载 YAML 解析器
     try:
-        return yaml.safe_load(frontmatter_text) or {}
+        return yaml.safe_load(frontmatter_text) or {}, end + 3
     except yaml.YAMLError:
-        return {}
-
+        return {}, end + 3
 
-def parse_plan_document(plan_file: Path) -> List[Phase]:
-    """解析计划文档，提取阶段信息"""
-    with open(plan_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 解析 frontmatter
-    frontmatter = parse_frontmatter(content)
-    
-    # 提取 markdown 内容（跳过 frontmatter）
-    if content.startswith('---'):
-        end = content.find('---', 3)
-        markdown_content = content[end + 3:].strip()
-    else:
-        markdown_content = content
-    
-    phases = []
 
-    plan_overview = frontmatter.get("overview", "").strip()
+def _common_background(frontmatter: Dict[str, Any], markdown_content: str) -> str:
+    """由 frontmatter 的 overview 与正文的根因 / 会议问题拼出各阶段共用的背景"""
+    plan_overview = (frontmatter.get("overview") or "").strip()
     background_parts = []
     if plan_overview:
         background_parts.append(f"概述: {plan_overview}")
 
-    root_cause_match = re.search(
-        r'### Root Cause\s+(.*?)(?=### Evidence|### Issues|## |$)',
-        markdown_content,
-        re.DOTALL
-    )
+    root_cause_match = _RE_ROOT_CAUSE.search(markdown_content)
     if root_cause_match:
         background_parts.append(f"根因: {root_cause_match.group(1).strip()}")
 
-    issues_match = re.search(
-        r'### Issues Reported in Meeting\s+(.*?)(?=## |$)',
-        markdown_content,
-        re.DOTALL
-    )
+    issues_match = _RE_ISSUES.search(markdown_content)
     if issues_match:
         background_parts.append(f"会议问题: {issues_match.group(1).strip()}")
 
-    common_background = "\n\n".join(background_parts).strip()
+    return "\n\n".join(background_parts).strip()
+
+
+def _phases_from_frontmatter(entries: List[Any], common_background: Callable[[], str]) -> List[Phase]:
+    """
+    由 frontmatter 中的 phases 列表构建阶段
+
+    每项需含 name，可选 number / goal / tasks / acceptance_criteria /
+    affected_files / background；tasks 可为 {id, content} 或纯文本。缺少
+    background 时才计算共用背景。任一项不合规时返回空列表，由调用方回退到正文解析。
+    """
+    phases = []
+    background = None
+    for idx, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get("name"):
+            return []
+        tasks = []
+        for task_idx, task in enumerate(entry.get("tasks") or [], start=1):
+            if isinstance(task, dict):
+                tasks.append({"id": str(task.get("id", f"task-{task_idx}")), "content": str(task.get("content", ""))})
+            else:
+                tasks.append({"id": f"task-{task_idx}", "content": str(task)})
+        phase_background = entry.get("background")
+        if not phase_background:
+            if background is None:
+                background = common_background()
+            phase_background = background
+        phases.append(Phase(
+            number=int(entry.get("number", idx)),
+            name=str(entry["name"]),
+            goal=str(entry.get("goal", "")),
+            tasks=tasks,
+            acceptance_criteria=[str(ac) for ac in entry.get("acceptance_criteria") or []],
+            affected_files=[str(f) for f in entry.get("affected_files") or []],
+            background=phase_background,
+        ))
+    return phases
+
+
+def parse_plan_document(plan_file: Path) -> List[Phase]:
+    """解析计划文档，提取阶段信息"""
+    with open(plan_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # 解析 frontmatter，并按返回的偏移直接截取 markdown 内容
+    frontmatter, body_offset = parse_frontmatter(content)
+    markdown_content = content[body_offset:].strip()
+
+    # frontmatter 已结构化列出阶段时直接构建，不再用正则扫描正文
+    if isinstance(frontmatter.get("phases"), list):
+        phases = _phases_from_frontmatter(
+            frontmatter["phases"],
+            lambda: _common_background(frontmatter, markdown_content),
+        )
+        if phases:
+            return phases
+    
+    phases = []
+    common_background = _common_background(frontmatter, markdown_content)
+
+    # 单次扫描识别各阶段标题（编号与名称须对应）
+    found_phases = {
+        int(m['num']) for m in _RE_PHASES.finditer(markdown_content)
+        if _PHASE_TITLES[int(m['num'])] == m['name']
+    }
     
     # 识别 Phase 1: Sync Logic Enhancement
-    phase1_match = re.search(
-        r'### Phase 1: Sync Logic Enhancement\s+(.*?)(?=### Phase 2:|## |$)',
-        markdown_content,
-        re.DOTALL
-    )
-    if phase1_match:
-        phase1_content = phase1_match.group(1)
+    if 1 in found_phases:
         # 提取任务（从 frontmatter todos 中）
         phase1_tasks = [
             {'id': 'analyze-sync-logic', 'content': 'Document exact sync logic flow and identify all matching points'},
@@ -123,13 +284,7 @@ def parse_plan_document(plan_file: Path) -> List[Phase]:
         ))
     
     # 识别 Phase 2: Data Repair Script
-    phase2_match = re.search(
-        r'### Phase 2: Data Repair Script\s+(.*?)(?=### Phase 3:|## |$)',
-        markdown_content,
-        re.DOTALL
-    )
-    if phase2_match:
-        phase2_content = phase2_match.group(1)
+    if 2 in found_phases:
         phase2_tasks = [
             {'id': 'create-repair-script', 'content': 'Create script to backfill course_unit_id for historical courses'},
             {'id': 'fix-duplicate-courses', 'content': 'Clean up duplicate courses in affected classes'},
@@ -153,13 +308,7 @@ def parse_plan_document(plan_file: Path) -> List[Phase]:
         ))
     
     # 识别 Phase 3: Validate and Test
-    phase3_match = re.search(
-        r'### Phase 3: Validate and Test\s+(.*?)(?=## |$)',
-        markdown_content,
-        re.DOTALL
-    )
-    if phase3_match:
-        phase3_content = phase3_match.group(1)
+    if 3 in found_phases:
         phase3_tasks = [
             {'id': 'test-dry-run', 'content': 'Test sync with dry_run on affected classes'},
             {'id': 'validate-results', 'content': 'Verify course counts and media assignments match demo'}
@@ -196,88 +345,75 @@ def format_phase_input(phase: Phase) -> str:
         f"目标：{phase.goal}",
         "",
         "任务列表：",
-    ]
-    
-    for task in phase.tasks:
-        lines.append(f"- {task['id']}: {task['content']}")
-    
-    lines.extend([
+        *[f"- {task['id']}: {task['content']}" for task in phase.tasks],
         "",
         "验收标准：",
-    ])
-    
-    for ac in phase.acceptance_criteria:
-        lines.append(f"- {ac}")
+        *[f"- {ac}" for ac in phase.acceptance_criteria],
+    ]
     
     if phase.affected_files:
-        lines.extend([
-            "",
-            "相关文件：",
-        ])
-        for file in phase.affected_files:
-            lines.append(f"- {file}")
+        lines += ["", "相关文件：", *[f"- {file}" for file in phase.affected_files]]
     
     return "\n".join(lines)
 
 
 def update_spec_project_context(feature_id: str, project_record_id: Optional[str] = None,
                                 mentor_user_id: Optional[str] = None,
-                                intern_user_id: Optional[str] = None) -> bool:
-    """更新 Spec 的 project_context_ref"""
+                                intern_user_id: Optional[str] = None,
+                                store=None) -> bool:
+    """更新 Spec 的 project_context_ref（store 默认为共用的 SpecStore）"""
     if not project_record_id:
         return False
     
-    # 导入 canonical 模块
-    # 确保在正确的路径下导入
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    project_root_str = str(project_root.absolute())
-    if project_root_str not in sys.path:
-        sys.path.insert(0, project_root_str)
-    
-    try:
-        from canonical.store.spec_store import SpecStore
-        from canonical.models.spec import ProjectContextRef
-    except ImportError as e:
-        print(f"警告: 无法导入 canonical 模块: {e}，将跳过 project_context_ref 设置", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
+    c = _canonical()
+    if c is None:
+        print("警告: 将跳过 project_context_ref 设置", file=sys.stderr)
         return False
     
     try:
-        spec_store = SpecStore()
-        spec = spec_store.load(feature_id)
-        if not spec:
+        # 直接修补当前版本文件中的 project_context_ref，避免整份 Spec 的
+        # pydantic 加载与重新序列化，也不生成新版本
+        spec_store = store or _spec_store()
+        version = spec_store.latest_version(feature_id)
+        if not version:
             print(f"警告: 无法加载 Feature {feature_id}", file=sys.stderr)
             return False
+        spec_file = spec_store.base_dir / feature_id / f"{version}.json"
+        data = _load_json(spec_file.read_bytes())
 
         # 创建或更新 project_context_ref
-        if not spec.project_context_ref:
-            spec.project_context_ref = ProjectContextRef()
+        ref = data.get("project_context_ref")
+        if not ref:
+            ref = data["project_context_ref"] = dict.fromkeys(c.ProjectContextRef.model_fields)
 
-        spec.project_context_ref.project_record_id = project_record_id
+        ref["project_record_id"] = project_record_id
         if mentor_user_id:
-            spec.project_context_ref.mentor_user_id = mentor_user_id
+            ref["mentor_user_id"] = mentor_user_id
         if intern_user_id:
-            spec.project_context_ref.intern_user_id = intern_user_id
+            ref["intern_user_id"] = intern_user_id
 
-        # 直接写回当前版本文件，避免版本冲突
-        feature_dir = spec_store.base_dir / spec.feature.feature_id
-        spec_file = feature_dir / f"{spec.meta.spec_version}.json"
-        if not spec_file.exists():
-            print(f"警告: 未找到 Spec 文件: {spec_file}", file=sys.stderr)
-            return False
-
-        with open(spec_file, 'w', encoding='utf-8') as f:
-            json.dump(spec.model_dump(mode='json'), f, indent=2, ensure_ascii=False, default=str)
+        # 原子替换：写到一半被中断也不会截断该版本唯一的文件
+        c.atomic_write_bytes(spec_file, _dump_json(data))
+        invalidate_gate_result(feature_id)
         return True
     except Exception as e:
         print(f"警告: 更新 project_context_ref 失败: {e}", file=sys.stderr)
         return False
 
 
-def write_answers_file(phase: Phase) -> Path:
-    """为 acceptance_criteria 写入答案文件"""
+def parse_apply_result(stdout: str) -> Dict[str, Any]:
+    """解析 canonical apply --json 输出的最后一行 JSON 结果，找不到时返回空字典"""
+    for line in reversed(stdout.splitlines()):
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    return {}
+
+
+def build_answers(phase: Phase) -> bytes:
+    """为 acceptance_criteria 生成答案 JSON（经 stdin 传给 canonical answer --file -）"""
     criteria = []
     for idx, text in enumerate(phase.acceptance_criteria, start=1):
         criteria.append({"id": f"AC-{idx}", "criteria": text})
@@ -286,52 +422,59 @@ def write_answers_file(phase: Phase) -> Path:
         "spec.acceptance_criteria": criteria,
         "spec.background": phase.background,
     }
-    temp_dir = Path(tempfile.mkdtemp(prefix="canonical-answers-"))
-    file_path = temp_dir / "answers.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(answers, f, ensure_ascii=False, indent=2)
-    return file_path
+    return _dump_json(answers)
+
+
+# load_gate_result 复用的 GateEngine，以及
+# feature_id -> ((spec_version, mtime_ns), GateResult) 缓存
+_GATE_ENGINE = None
+_GATE_CACHE: Dict[str, Tuple[Tuple[str, int], Any]] = {}
+
+
+def invalidate_gate_result(feature_id: str) -> None:
+    """丢弃 feature 的缓存 gate 结果（spec 被子进程修改后调用）"""
+    _GATE_CACHE.pop(feature_id, None)
 
 
 def load_gate_result(feature_id: str):
-    """使用 GateEngine 获取 gate 结果"""
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    project_root_str = str(project_root.absolute())
-    if project_root_str not in sys.path:
-        sys.path.insert(0, project_root_str)
+    """使用 GateEngine 获取 gate 结果（spec 最新版本文件未变化时复用上次结果）"""
+    global _GATE_ENGINE
+    spec_store = _spec_store()
+    if spec_store is None:
+        return None
+
+    if _GATE_ENGINE is None:
+        _GATE_ENGINE = _canonical().GateEngine()
 
+    version = spec_store.latest_version(feature_id)
+    if version is None:
+        return None
+    spec_file = spec_store.base_dir / feature_id / f"{version}.json"
     try:
-        from canonical.store.spec_store import SpecStore
-        from canonical.engine.gate import GateEngine
-    except ImportError as e:
-        print(f"警告: 无法导入 GateEngine: {e}", file=sys.stderr)
+        stamp = (version, spec_file.stat().st_mtime_ns)
+    except FileNotFoundError:
         return None
 
-    spec_store = SpecStore()
-    spec = spec_store.load(feature_id)
+    cached = _GATE_CACHE.get(feature_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    spec = spec_store.load(feature_id, version)
     if not spec:
         return None
 
-    gate_engine = GateEngine()
-    return gate_engine.validate(spec)
-
+    gate_result = _GATE_ENGINE.validate(spec)
+    _GATE_CACHE[feature_id] = (stamp, gate_result)
+    return gate_result
 
-def build_fallback_vv(feature_id: str) -> Optional[Path]:
-    """为已存在的任务生成最小 VV，避免 LLM 失败"""
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    project_root_str = str(project_root.absolute())
-    if project_root_str not in sys.path:
-        sys.path.insert(0, project_root_str)
 
-    try:
-        from canonical.store.spec_store import SpecStore
-    except ImportError as e:
-        print(f"警告: 无法导入 canonical 模块以生成 VV: {e}", file=sys.stderr)
+def build_fallback_vv(feature_id: str) -> Optional[bytes]:
+    """为已存在的任务生成最小 VV 答案 JSON，避免 LLM 失败"""
+    spec_store = _spec_store()
+    if spec_store is None:
+        print("警告: 无法生成 VV", file=sys.stderr)
         return None
 
-    spec_store = SpecStore()
     spec = spec_store.load(feature_id)
     if not spec or not spec.planning.tasks:
         print("警告: 未找到任务，无法生成 VV", file=sys.stderr)
@@ -353,59 +496,413 @@ def build_fallback_vv(feature_id: str) -> Optional[Path]:
         })
 
     answers = {"planning.vv": vv_items}
-    temp_dir = Path(tempfile.mkdtemp(prefix="canonical-vv-"))
-    file_path = temp_dir / "vv.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(answers, f, ensure_ascii=False, indent=2)
-    return file_path
+    return _dump_json(answers)
 
 
+@lru_cache(maxsize=1)
 def get_python_executable() -> str:
-    """获取 Python 可执行文件路径，优先使用虚拟环境"""
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    
+    """获取 Python 可执行文件路径，优先使用虚拟环境（进程内只探测一次）"""
     # 检查项目目录下的 venv
-    venv_python = project_root / "venv" / "bin" / "python"
-    if venv_python.exists():
-        return str(venv_python)
+    venv_python = os.path.join(_PROJECT_ROOT, "venv", "bin", "python")
+    if os.path.exists(venv_python):
+        return venv_python
     
     # 检查父目录的 venv（backend/venv）
-    parent_venv_python = project_root.parent / "backend" / "venv" / "bin" / "python"
-    if parent_venv_python.exists():
-        return str(parent_venv_python)
+    parent_venv_python = os.path.join(os.path.dirname(_PROJECT_ROOT), "backend", "venv", "bin", "python")
+    if os.path.exists(parent_venv_python):
+        return parent_venv_python
     
     # 使用系统 python3
     return "python3"
 
 
-def run_canonical_command(command: List[str]) -> subprocess.CompletedProcess:
-    """运行 canonical 命令"""
+# 流式转发子进程输出时，返回结果中保留的输出末尾行数
+_OUTPUT_TAIL_LINES = 200
+
+
+class _OutputSink:
+    """
+    收集 canonical 命令的输出：完整的行逐行转发到 log；转发时只保留末尾
+    _OUTPUT_TAIL_LINES 行，不转发时保留全部输出。
+    """
+
+    def __init__(self, log: Optional["_PhaseLog"] = None):
+        self.log = log
+        maxlen = _OUTPUT_TAIL_LINES if log is not None else None
+        self.tails = {False: deque(maxlen=maxlen), True: deque(maxlen=maxlen)}
+        self.partial = {False: "", True: ""}
+
+    def write(self, text: str, err: bool = False) -> None:
+        *lines, self.partial[err] = (self.partial[err] + text).split("\n")
+        for line in lines:
+            self._emit(line + "\n", err)
+
+    def _emit(self, line: str, err: bool) -> None:
+        self.tails[err].append(line)
+        if self.log is not None:
+            self.log(line.rstrip("\n"), err=err)
+
+    def result(self, command: List[str], returncode: int) -> subprocess.CompletedProcess:
+        for err, rest in self.partial.items():
+            if rest:
+                self._emit(rest, err)
+        self.partial = {False: "", True: ""}
+        return subprocess.CompletedProcess(
+            command, returncode, "".join(self.tails[False]), "".join(self.tails[True])
+        )
+
+
+class _CliWorker:
+    """
+    常驻的 canonical CLI 进程（python -m canonical.cli serve）
+
+    每行发送一个 {"cmd": [...]} 请求，读回 {"out"/"err": 文本} 消息直到
+    {"returncode": 退出码}。每个线程一个 worker，并发阶段互不阻塞。
+    命令自身的 stderr 经 {"err"} 消息转发；worker 进程的 stderr 继承自本进程，
+    启动失败、崩溃等诊断信息直接显示在终端。
+    """
+
+    def __init__(self, python_exe: str):
+        self.process = subprocess.Popen(
+            [python_exe, "-m", "canonical.cli", "serve"],
+            text=True,
+            encoding="utf-8",
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=1,
+            cwd=_PROJECT_ROOT
+        )
+
+    def call(self, args: List[str], sink: _OutputSink, input: Optional[str] = None) -> Optional[int]:
+        """执行一条命令并返回退出码；worker 未给出任何响应就退出时返回 None"""
+        request = {"cmd": args}
+        if input is not None:
+            request["stdin"] = input
+        try:
+            self.process.stdin.write(json.dumps(request, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            return None
+        responded = False
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # 绕过 sys.stdout 直接写到管道的输出，原样当作 stdout
+                message = {"out": line}
+            responded = True
+            if "returncode" in message:
+                return message["returncode"]
+            if "out" in message:
+                sink.write(message["out"])
+            if "err" in message:
+                sink.write(message["err"], err=True)
+        # 命令执行到一半时 worker 退出：按失败处理，避免重复执行有副作用的命令
+        return 2 if responded else None
+
+    def close(self) -> None:
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+_CLI_WORKERS = threading.local()
+_CLI_WORKER_POOL: List[_CliWorker] = []
+_CLI_WORKER_LOCK = threading.Lock()
+# serve 模式不可用（如旧版 CLI）时置为 True，此后直接逐条启动子进程
+_CLI_SERVE_UNAVAILABLE = False
+
+
+def _close_cli_workers() -> None:
+    with _CLI_WORKER_LOCK:
+        workers = list(_CLI_WORKER_POOL)
+        _CLI_WORKER_POOL.clear()
+    for worker in workers:
+        worker.close()
+
+
+def _cli_worker(python_exe: str) -> Optional[_CliWorker]:
+    """返回当前线程的常驻 canonical CLI 进程，首次调用时启动"""
+    if _CLI_SERVE_UNAVAILABLE:
+        return None
+    worker = getattr(_CLI_WORKERS, "worker", None)
+    if worker is None or worker.process.poll() is not None:
+        try:
+            worker = _CliWorker(python_exe)
+        except OSError:
+            return None
+        _CLI_WORKERS.worker = worker
+        with _CLI_WORKER_LOCK:
+            if not _CLI_WORKER_POOL:
+                atexit.register(_close_cli_workers)
+            _CLI_WORKER_POOL.append(worker)
+    return worker
+
+
+def run_canonical_command(command: List[str], log: Optional["_PhaseLog"] = None,
+                          input: Optional[bytes] = None) -> subprocess.CompletedProcess:
+    """
+    运行 canonical 命令
+
+    canonical 子命令优先交给常驻的 CLI 进程执行，省去每次的解释器启动和导入
+    开销；不可用时回退为逐条启动子进程。传入 log 时逐行转发 stdout/stderr
+    （不等命令结束），返回结果只保留末尾 _OUTPUT_TAIL_LINES 行。input 作为
+    命令的标准输入（如 answer --file - 读取的答案）。
+    """
+    global _CLI_SERVE_UNAVAILABLE
     python_exe = get_python_executable()
-    
+    sink = _OutputSink(log)
+    stdin_text = input.decode("utf-8") if input is not None else None
+
     # 尝试使用 python -m canonical.cli 如果直接调用失败
     if command[0] == "canonical":
+        worker = _cli_worker(python_exe)
+        if worker is not None:
+            returncode = worker.call(command[1:], sink, stdin_text)
+            if returncode is not None:
+                return sink.result(command, returncode)
+            _CLI_SERVE_UNAVAILABLE = True
+            with _PRINT_LOCK:
+                print("警告: canonical serve 模式不可用，改为逐条启动子进程执行命令", file=sys.stderr)
         # 替换为 python -m canonical.cli
         command = [python_exe, "-m", "canonical.cli"] + command[1:]
-    
+
     try:
-        process = subprocess.run(
+        process = subprocess.Popen(
             command,
             text=True,
-            capture_output=True,
-            check=False,
-            cwd=Path(__file__).parent.parent  # 确保在 canonical_frontend 目录下运行
+            stdin=subprocess.PIPE if stdin_text is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=1,
+            cwd=_PROJECT_ROOT  # 确保在 canonical_frontend 目录下运行
         )
-        return process
     except FileNotFoundError:
         print("错误: 无法运行 canonical 命令。", file=sys.stderr)
         print(f"尝试的命令: {' '.join(command)}", file=sys.stderr)
         print(f"Python 可执行文件: {python_exe}", file=sys.stderr)
         sys.exit(1)
 
+    def pump(stream, err: bool) -> None:
+        for line in stream:
+            sink.write(line, err)
+
+    def feed() -> None:
+        try:
+            process.stdin.write(stdin_text)
+            process.stdin.close()
+        except OSError:
+            pass  # 子进程未读完输入就退出
+
+    # 输入与 stderr 由后台线程处理，避免任一管道写满时互相阻塞
+    if stdin_text is not None:
+        threading.Thread(target=feed, daemon=True).start()
+    stderr_thread = threading.Thread(target=pump, args=(process.stderr, True), daemon=True)
+    stderr_thread.start()
+    pump(process.stdout, False)
+    stderr_thread.join()
+    return sink.result(command, process.wait())
+
+
+# 串行化 review/publish：发布会写共享的 Ledger，多进程并发写会产生冲突的 ledger_id
+_PUBLISH_LOCK = threading.Lock()
+# 保证各阶段的输出块整体打印
+_PRINT_LOCK = threading.Lock()
+
+
+class _PhaseLog:
+    """
+    单个阶段的输出。stream=True（逐个处理阶段）时立即打印；否则收集起来，
+    阶段结束后整体打印，避免并发阶段的日志交错。
+    """
+
+    def __init__(self, stream: bool = False):
+        self.stream = stream
+        self.lines: List[Tuple[str, bool]] = []
+
+    def __call__(self, text: Any = "", err: bool = False) -> None:
+        if self.stream:
+            with _PRINT_LOCK:
+                print(text, file=sys.stderr if err else sys.stdout, flush=True)
+        else:
+            self.lines.append((str(text), err))
+
+    def flush(self) -> None:
+        with _PRINT_LOCK:
+            for text, err in self.lines:
+                print(text, file=sys.stderr if err else sys.stdout)
+            self.lines.clear()
+
+
+def _process_phase(phase: Phase, feature_id: str, project_record_id: Optional[str],
+                   dry_run: bool, auto_review: bool, log: "_PhaseLog") -> None:
+    """处理单个阶段：canonical run → plan → vv → (review/publish)，输出写入 log"""
+    log(f"=== 处理 {phase.name} ===")
+
+    # 生成输入文本
+    input_text = format_phase_input(phase)
+
+    log(f"Feature ID: {feature_id}")
+    log(f"输入文本预览:\n{input_text[:200]}...\n")
+
+    # 调用 canonical run
+    # 注意: input_text 作为命令行参数传递
+    command = ["canonical", "run", input_text, "--feature-id", feature_id]
+
+    log("正在调用 canonical run...")
+    result = run_canonical_command(command, log=log)
+
+    if result.returncode != 0:
+        log(f"✗ {phase.name} Gate 未通过")
+
+        if phase.acceptance_criteria:
+            log("\n正在补齐验收标准...")
+            answer_result = run_canonical_command(
+                ["canonical", "answer", feature_id, "--file", "-"],
+                log=log,
+                input=build_answers(phase),
+            )
+            invalidate_gate_result(feature_id)
+            if answer_result.returncode != 0:
+                log("\n提示: 请手动使用 'canonical answer' 提供缺失信息")
+                log("\n" + "="*60 + "\n")
+                return
+        else:
+            log("\n提示: 请使用 'canonical answer' 命令提供缺失信息")
+            log("\n" + "="*60 + "\n")
+            return
+
+    gate_result = load_gate_result(feature_id)
+    if not gate_result or not gate_result.gate_s.is_passed:
+        log("\n提示: Gate S 未通过，请继续澄清后再进入 plan/vv")
+        log("\n" + "="*60 + "\n")
+        return
+
+    log(f"✓ {phase.name} Gate S 通过，进入任务规划")
+    log("\n正在生成任务规划...")
+    plan_result = run_canonical_command(["canonical", "plan", feature_id], log=log)
+    invalidate_gate_result(feature_id)
+    if plan_result.returncode != 0:
+        log("\n提示: 任务规划失败，停止后续步骤")
+        log("\n" + "="*60 + "\n")
+        return
+
+    gate_result = load_gate_result(feature_id)
+    if not gate_result or not gate_result.gate_t.is_passed:
+        log("\n提示: Gate T 未通过，请补齐任务后再进入 VV")
+        log("\n" + "="*60 + "\n")
+        return
+
+    log("正在生成验证项...")
+    vv_result = run_canonical_command(["canonical", "vv", feature_id], log=log)
+    invalidate_gate_result(feature_id)
+    if vv_result.returncode != 0:
+        log("\n提示: VV 生成失败，尝试使用回退 VV")
+        fallback_vv = build_fallback_vv(feature_id)
+        if not fallback_vv:
+            log("\n提示: 无法生成回退 VV，停止后续步骤")
+            log("\n" + "="*60 + "\n")
+            return
+        if not auto_review:
+            answer_vv = run_canonical_command(
+                ["canonical", "answer", feature_id, "--file", "-"],
+                log=log,
+                input=fallback_vv,
+            )
+            invalidate_gate_result(feature_id)
+            if answer_vv.returncode != 0:
+                log("\n提示: 回退 VV 写入失败，停止后续步骤")
+                log("\n" + "="*60 + "\n")
+                return
+            fallback_vv = None
+    else:
+        fallback_vv = None
+
+    # 自动确认时回退 VV 由 apply 一并写入，并由它检查 Gate
+    if fallback_vv is None:
+        gate_result = load_gate_result(feature_id)
+        if not gate_result or not gate_result.gate_v.is_passed:
+            log("\n提示: Gate V 未通过，请补齐验证项后再进入 review/publish")
+            log("\n" + "="*60 + "\n")
+            return
+
+    if auto_review:
+        # 更新 project_context_ref（如果提供）
+        if project_record_id:
+            log(f"\n正在设置 project_context_ref...")
+            if update_spec_project_context(feature_id, project_record_id):
+                log("✓ project_context_ref 已设置")
+            else:
+                log("警告: 无法设置 project_context_ref，发布可能会失败", err=True)
+
+        # 自动 review (go) 并发布到飞书：回退 VV、确认、发布合并为一次 apply 调用
+        command = ["canonical", "apply", feature_id, "--review", "go", "--json"]
+        if fallback_vv:
+            command += ["--answers", "-"]
+        log(f"\n正在自动确认 {feature_id}...")
+        if dry_run:
+            apply_result = run_canonical_command(command, log=log, input=fallback_vv)
+        else:
+            log(f"正在发布 {feature_id} 到飞书...")
+            with _PUBLISH_LOCK:
+                apply_result = run_canonical_command(command + ["--publish"], log=log, input=fallback_vv)
+        invalidate_gate_result(feature_id)
+        outcome = parse_apply_result(apply_result.stdout)
+
+        if fallback_vv and not outcome.get("answered"):
+            log("\n提示: 回退 VV 写入失败，停止后续步骤")
+        elif outcome.get("gate_passed") is False:
+            log("\n提示: Gate V 未通过，请补齐验证项后再进入 review/publish")
+        elif not outcome.get("reviewed"):
+            log("✗ Review 失败", err=True)
+        elif dry_run:
+            log(f"✓ {phase.name} 准备发布（dry-run 模式）")
+        elif outcome.get("published"):
+            log(f"✓ {phase.name} 已成功发布到飞书")
+        else:
+            log("✗ 发布失败", err=True)
+            if "project_record_id" in apply_result.stderr:
+                log("\n提示: 请设置 project_record_id。可以使用以下方式:")
+                log("  1. 通过 --project-record-id 参数")
+                log("  2. 通过环境变量 CANONICAL_PROJECT_RECORD_ID")
+                log("  3. 手动更新 Spec 文件")
+    else:
+        # 更新 project_context_ref（如果提供）
+        if project_record_id:
+            log(f"\n正在设置 project_context_ref...")
+            if update_spec_project_context(feature_id, project_record_id):
+                log("✓ project_context_ref 已设置")
+            else:
+                log("警告: 无法设置 project_context_ref，发布时需要手动设置", err=True)
+
+        log(f"\n提示: 使用以下命令确认并发布:")
+        log(f"  canonical review {feature_id}")
+        if project_record_id:
+            log(f"  canonical publish {feature_id}")
+        else:
+            log(f"  # 注意: 发布前需要设置 project_record_id")
+            log(f"  # 方式1: 通过环境变量 CANONICAL_PROJECT_RECORD_ID")
+            log(f"  # 方式2: 手动更新 Spec 文件中的 project_context_ref.project_record_id")
+            log(f"  canonical publish {feature_id}")
+
+    log("\n" + "="*60 + "\n")
+
+
+def _run_phase(phase: Phase, feature_id: str, project_record_id: Optional[str],
+               dry_run: bool, auto_review: bool, stream: bool = False) -> None:
+    """在工作线程中处理一个阶段；非流式时结束后整体打印其输出"""
+    log = _PhaseLog(stream=stream)
+    try:
+        _process_phase(phase, feature_id, project_record_id, dry_run, auto_review, log)
+    finally:
+        log.flush()
+
 
 def process_plan_to_feishu(plan_file: Path, project_record_id: Optional[str] = None, 
-                          dry_run: bool = False, auto_review: bool = False):
+                          dry_run: bool = False, auto_review: bool = False,
+                          jobs: Optional[int] = None):
     """处理计划文档，生成飞书需求条目"""
     
     print(f"正在解析计划文档: {plan_file}")
@@ -419,169 +916,33 @@ def process_plan_to_feishu(plan_file: Path, project_record_id: Optional[str] = N
     
     print(f"✓ 识别到 {len(phases)} 个阶段\n")
     
+    # 2. 预先为各阶段生成 feature_id（格式: F-YYYY-NNN）
+    # 共用 SpecStore 的内存计数保证并发阶段拿到不同的 ID
+    spec_store = _spec_store()
     feature_ids = []
-    
-    # 2. 为每个阶段生成输入文本并调用 canonical run
     for phase in phases:
-        print(f"=== 处理 {phase.name} ===")
-        
-        # 生成输入文本
-        input_text = format_phase_input(phase)
-        
-        # 生成 feature_id (格式: F-YYYY-NNN)
-        # 使用 SpecStore 生成，确保唯一性
-        try:
-            from canonical.store.spec_store import SpecStore
-            spec_store = SpecStore()
+        if spec_store is not None:
             feature_id = spec_store.generate_feature_id()
-        except ImportError:
+        else:
             # 如果无法导入，使用简单生成方式
+            from datetime import datetime
             year = datetime.now().strftime("%Y")
             # 使用时间戳确保唯一性
             import time
             seq = int(time.time()) % 1000 + phase.number
             feature_id = f"F-{year}-{seq:03d}"
-        
         feature_ids.append(feature_id)
-        
-        print(f"Feature ID: {feature_id}")
-        print(f"输入文本预览:\n{input_text[:200]}...\n")
-        
-        # 调用 canonical run
-        # 注意: input_text 作为命令行参数传递
-        command = ["canonical", "run", input_text, "--feature-id", feature_id]
-        
-        print("正在调用 canonical run...")
-        result = run_canonical_command(command)
-        
-        if result.returncode != 0:
-            print(f"✗ {phase.name} Gate 未通过")
-            print(result.stdout)
-            print(result.stderr, file=sys.stderr)
-
-            if phase.acceptance_criteria:
-                print("\n正在补齐验收标准...")
-                answers_file = write_answers_file(phase)
-                answer_result = run_canonical_command(
-                    ["canonical", "answer", feature_id, "--file", str(answers_file)]
-                )
-                print(answer_result.stdout)
-                if answer_result.returncode != 0:
-                    print(answer_result.stderr, file=sys.stderr)
-                    print("\n提示: 请手动使用 'canonical answer' 提供缺失信息")
-                    print("\n" + "="*60 + "\n")
-                    continue
-            else:
-                print("\n提示: 请使用 'canonical answer' 命令提供缺失信息")
-                print("\n" + "="*60 + "\n")
-                continue
-
-        gate_result = load_gate_result(feature_id)
-        if not gate_result or not gate_result.gate_s.is_passed:
-            print("\n提示: Gate S 未通过，请继续澄清后再进入 plan/vv")
-            print("\n" + "="*60 + "\n")
-            continue
-
-        print(f"✓ {phase.name} Gate S 通过，进入任务规划")
-        print(result.stdout)
-
-        print("\n正在生成任务规划...")
-        plan_result = run_canonical_command(["canonical", "plan", feature_id])
-        print(plan_result.stdout)
-        if plan_result.returncode != 0:
-            print(plan_result.stderr, file=sys.stderr)
-            print("\n提示: 任务规划失败，停止后续步骤")
-            print("\n" + "="*60 + "\n")
-            continue
-
-        gate_result = load_gate_result(feature_id)
-        if not gate_result or not gate_result.gate_t.is_passed:
-            print("\n提示: Gate T 未通过，请补齐任务后再进入 VV")
-            print("\n" + "="*60 + "\n")
-            continue
-
-        print("正在生成验证项...")
-        vv_result = run_canonical_command(["canonical", "vv", feature_id])
-        print(vv_result.stdout)
-        if vv_result.returncode != 0:
-            print(vv_result.stderr, file=sys.stderr)
-            print("\n提示: VV 生成失败，尝试使用回退 VV")
-            fallback_file = build_fallback_vv(feature_id)
-            if not fallback_file:
-                print("\n提示: 无法生成回退 VV，停止后续步骤")
-                print("\n" + "="*60 + "\n")
-                continue
-            answer_vv = run_canonical_command(
-                ["canonical", "answer", feature_id, "--file", str(fallback_file)]
-            )
-            print(answer_vv.stdout)
-            if answer_vv.returncode != 0:
-                print(answer_vv.stderr, file=sys.stderr)
-                print("\n提示: 回退 VV 写入失败，停止后续步骤")
-                print("\n" + "="*60 + "\n")
-                continue
-
-        gate_result = load_gate_result(feature_id)
-        if not gate_result or not gate_result.gate_v.is_passed:
-            print("\n提示: Gate V 未通过，请补齐验证项后再进入 review/publish")
-            print("\n" + "="*60 + "\n")
-            continue
-
-        if auto_review:
-                # 更新 project_context_ref（如果提供）
-                if project_record_id:
-                    print(f"\n正在设置 project_context_ref...")
-                    if update_spec_project_context(feature_id, project_record_id):
-                        print("✓ project_context_ref 已设置")
-                    else:
-                        print("警告: 无法设置 project_context_ref，发布可能会失败", file=sys.stderr)
-                
-                # 自动 review (go)
-                print(f"\n正在自动确认 {feature_id}...")
-                review_result = run_canonical_command(
-                    ["canonical", "review", feature_id, "--decision", "go"]
-                )
-                if review_result.returncode == 0:
-                    print(review_result.stdout)
-                    
-                    if not dry_run:
-                        # 发布到飞书
-                        print(f"\n正在发布 {feature_id} 到飞书...")
-                        publish_result = run_canonical_command(["canonical", "publish", feature_id])
-                        if publish_result.returncode == 0:
-                            print(publish_result.stdout)
-                            print(f"✓ {phase.name} 已成功发布到飞书")
-                        else:
-                            print(f"✗ 发布失败: {publish_result.stderr}", file=sys.stderr)
-                            if "project_record_id" in publish_result.stderr:
-                                print("\n提示: 请设置 project_record_id。可以使用以下方式:")
-                                print("  1. 通过 --project-record-id 参数")
-                                print("  2. 通过环境变量 CANONICAL_PROJECT_RECORD_ID")
-                                print("  3. 手动更新 Spec 文件")
-                    else:
-                        print(f"✓ {phase.name} 准备发布（dry-run 模式）")
-                else:
-                    print(f"✗ Review 失败: {review_result.stderr}", file=sys.stderr)
-        else:
-                # 更新 project_context_ref（如果提供）
-                if project_record_id:
-                    print(f"\n正在设置 project_context_ref...")
-                    if update_spec_project_context(feature_id, project_record_id):
-                        print("✓ project_context_ref 已设置")
-                    else:
-                        print("警告: 无法设置 project_context_ref，发布时需要手动设置", file=sys.stderr)
-                
-                print(f"\n提示: 使用以下命令确认并发布:")
-                print(f"  canonical review {feature_id}")
-                if project_record_id:
-                    print(f"  canonical publish {feature_id}")
-                else:
-                    print(f"  # 注意: 发布前需要设置 project_record_id")
-                    print(f"  # 方式1: 通过环境变量 CANONICAL_PROJECT_RECORD_ID")
-                    print(f"  # 方式2: 手动更新 Spec 文件中的 project_context_ref.project_record_id")
-                    print(f"  canonical publish {feature_id}")
-        
-        print("\n" + "="*60 + "\n")
+    
+    # 3. 各阶段互相独立（feature_id 不同），并发执行其 canonical 子进程
+    from concurrent.futures import ThreadPoolExecutor  # 仅在真正处理阶段时加载
+    workers = max(1, min(jobs or len(phases), len(phases)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_phase, phase, feature_id, project_record_id, dry_run, auto_review, workers == 1)
+            for phase, feature_id in zip(phases, feature_ids)
+        ]
+        for future in futures:
+            future.result()
     
     # 总结
     print("=== 处理完成 ===")
@@ -627,6 +988,13 @@ def main():
         help='仅显示将要执行的操作，不实际发布'
     )
     
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=None,
+        help='并发处理的阶段数（默认全部阶段并发，1 为逐个处理）'
+    )
+    
     parser.add_argument(
         '--auto-review',
         action='store_true',
@@ -642,7 +1010,6 @@ def main():
     
     # 设置项目记录ID到环境变量（如果提供）
     if args.project_record_id:
-        import os
         os.environ['CANONICAL_PROJECT_RECORD_ID'] = args.project_record_id
     
     # 执行处理
@@ -650,7 +1017,8 @@ def main():
         plan_file=args.plan_file,
         project_record_id=args.project_record_id,
         dry_run=args.dry_run,
-        auto_review=args.auto_review
+        auto_review=args.auto_review,
+        jobs=args.jobs
     )
 
 